@@ -0,0 +1,220 @@
+"""Модуль сжатия HTTP ответов.
+
+Ответы сжимаются gzip, brotli или zstd (при наличии пакетов `brotli` и
+`zstandard`) в зависимости от `Accept-Encoding`. Небольшие ответы (например,
+фрагменты HTMX для удаления строк) и уже сжатые ответы передаются как есть.
+Потоковые ответы сжимаются по частям, каждая часть отправляется сразу.
+"""
+
+import zlib
+from collections.abc import Callable
+from typing import Final, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.responses import parse_accept_encoding
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment]
+
+# Типы содержимого, которые имеет смысл сжимать
+COMPRESSIBLE_TYPES: Final = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes:
+        """Данные, накопленные к текущему моменту (для потоковой передачи)."""
+        ...
+
+    def finish(self) -> bytes: ...
+
+
+class GzipCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware сжатия ответов."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        # Кодировки в порядке предпочтения
+        self.compressors: dict[str, Callable[[], Compressor]] = {}
+        if zstandard is not None:
+            self.compressors["zstd"] = lambda: ZstdCompressor(zstd_level)
+        if brotli is not None:
+            self.compressors["br"] = lambda: BrotliCompressor(brotli_quality)
+        self.compressors["gzip"] = lambda: GzipCompressor(gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        accepted = parse_accept_encoding(headers.get("accept-encoding", ""))
+        encoding = next((i for i in self.compressors if i in accepted), None)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(
+            send,
+            encoding,
+            self.compressors[encoding],
+            self.minimum_size,
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Обработчик сообщений одного ответа."""
+
+    def __init__(
+        self,
+        send: Send,
+        encoding: str,
+        compressor_factory: Callable[[], Compressor],
+        minimum_size: int,
+    ) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.compressor_factory = compressor_factory
+        self.minimum_size = minimum_size
+        self.start_message: Message | None = None
+        self.compressor: Compressor | None = None
+        # Решение о сжатии принимается по первой части тела ответа
+        self.passthrough: bool | None = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.passthrough is None:
+            await self._start(message)
+            return
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        await self._send_compressed(message)
+
+    async def _start(self, message: Message) -> None:
+        if self.start_message is None:
+            msg = "Тело ответа до его заголовков"
+            raise RuntimeError(msg)
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+
+        self.passthrough = (
+            "content-encoding" in headers
+            or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            or (not more_body and len(body) < self.minimum_size)
+        )
+        if self.passthrough:
+            await self._send(self.start_message)
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # NOTE: Сжатое содержимое отличается от исходного байт в байт
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+        self.compressor = self.compressor_factory()
+        if more_body:
+            del headers["Content-Length"]
+            await self._send(self.start_message)
+            await self._send_compressed(message)
+            return
+
+        compressed = self.compressor.compress(body) + self.compressor.finish()
+        headers["Content-Length"] = str(len(compressed))
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    async def _send_compressed(self, message: Message) -> None:
+        if self.compressor is None:
+            msg = "Сжатие не начато"
+            raise RuntimeError(msg)
+
+        body = self.compressor.compress(message.get("body", b""))
+        if message.get("more_body", False):
+            body += self.compressor.flush()
+            if body:
+                await self._send(
+                    {"type": "http.response.body", "body": body, "more_body": True},
+                )
+            return
+
+        body += self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": body})
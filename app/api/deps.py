@@ -1,19 +1,32 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Awaitable, Callable, Hashable, Sequence
+from email.utils import formatdate
 from typing import Annotated
 
-from fastapi import Depends
-from sqlmodel import Session
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.db import engine
+from app.api.responses import REVALIDATE_CACHE_CONTROL, is_not_modified
+from app.core.db import async_engine
+from app.core.singleflight import render_flight
+from app.core.versions import data_versions
+from app.models import Base
 from app.services import CocktailService, IngredientService
+from app.services.drafts import DraftStore, cocktail_drafts
 
 
-def _get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+def new_session() -> AsyncSession:
+    """Сессия БД, в том числе для работы вне зависимостей запроса."""
+    # NOTE: После commit объекты не должны перечитываться неявно (lazy load
+    # недоступен в асинхронном режиме)
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+
+async def _get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with new_session() as session:
         yield session
 
 
-SessionDep = Annotated[Session, Depends(_get_db)]
+SessionDep = Annotated[AsyncSession, Depends(_get_db)]
 
 
 def _get_ingredient_service(session: SessionDep) -> IngredientService:
@@ -28,3 +41,53 @@ def _get_cocktail_service(session: SessionDep) -> CocktailService:
 
 
 CocktailServiceDep = Annotated[CocktailService, Depends(_get_cocktail_service)]
+
+
+def _get_draft_store() -> DraftStore:
+    return cocktail_drafts
+
+
+DraftStoreDep = Annotated[DraftStore, Depends(_get_draft_store)]
+
+
+def conditional_get(
+    *models: type[Base],
+    item: type[Base] | None = None,
+) -> Callable[[Request, Response], None]:
+    """Зависимость условного GET по версиям таблиц `models` и записи `item`.
+
+    ID записи берется из параметра пути `item_id`. При совпадении ETag с
+    `If-None-Match` ответ `304` возвращается до загрузки данных.
+    """
+
+    def _check(request: Request, response: Response) -> None:
+        keys: list[Hashable] = [(i.__tablename__,) for i in models]
+        if item is not None:
+            keys.append((item.__tablename__, int(request.path_params["item_id"])))
+
+        etag = data_versions.etag(keys)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(data_versions.modified_at(keys), usegmt=True),
+            "Cache-Control": REVALIDATE_CACHE_CONTROL,
+        }
+        if is_not_modified(request, etag):
+            raise HTTPException(status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    return _check
+
+
+async def shared_render(
+    key: tuple[Hashable, ...],
+    models: Sequence[type[Base]],
+    render: Callable[[], Awaitable[str]],
+) -> str:
+    """HTML, общий для одинаковых одновременных запросов.
+
+    `key` - маршрут и нормализованные параметры запроса. К ключу добавляются
+    версии таблиц `models`, поэтому запросы после изменения данных не
+    получат результат, вычисленный до него.
+    """
+    version = data_versions.etag([(i.__tablename__,) for i in models])
+    return await render_flight.do((*key, version), render)
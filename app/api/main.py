@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.routes import cocktail, ingredient, main
+from app.api.routes import cocktail, ingredient, main, static, stats
 
 app_router = APIRouter()
 app_router.include_router(cocktail.router, prefix="/cocktails", tags=["cocktails"])
@@ -8,3 +8,5 @@ app_router.include_router(main.router, tags=["main"])
 app_router.include_router(
     ingredient.router, prefix="/ingredients", tags=["ingredients"]
 )
+app_router.include_router(stats.router, prefix="/stats", tags=["stats"])
+app_router.include_router(static.router, prefix="/static", tags=["static"])
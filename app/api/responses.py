@@ -0,0 +1,75 @@
+"""Модуль вспомогательных HTTP ответов."""
+
+from collections.abc import Mapping
+
+from fastapi import Request, Response
+
+from app.core.utils import content_hash
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Проверить совпадение ETag с заголовком `If-None-Match`."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    tags = {i.strip().removeprefix("W/") for i in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def accepted_encodings(request: Request) -> set[str]:
+    """Кодировки из заголовка `Accept-Encoding` (кроме явно запрещенных)."""
+    return parse_accept_encoding(request.headers.get("accept-encoding", ""))
+
+
+def parse_accept_encoding(header: str) -> set[str]:
+    encodings = set()
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        if params.replace(" ", "") in {"q=0", "q=0.0", "q=0.00", "q=0.000"}:
+            continue
+        if name := name.strip().lower():
+            encodings.add(name)
+    return encodings
+
+
+def etag_response(
+    request: Request,
+    content: bytes,
+    etag: str,
+    media_type: str,
+    cache_control: str = REVALIDATE_CACHE_CONTROL,
+    headers: Mapping[str, str] | None = None,
+) -> Response:
+    """Ответ с ETag, `304 Not Modified` при совпадении с `If-None-Match`."""
+    headers = {"ETag": etag, "Cache-Control": cache_control, **(headers or {})}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type=media_type, headers=headers)
+
+
+def icon_response(request: Request, icon: bytes | None) -> Response:
+    """Ответ с иконкой и строгим ETag по ее содержимому.
+
+    Если запрос содержит хеш содержимого (`?v=...`), ответ кешируется
+    браузером без повторной проверки.
+    """
+    if icon is None:
+        return Response(status_code=404)
+
+    version = content_hash(icon)
+    cache_control = (
+        IMMUTABLE_CACHE_CONTROL
+        if request.query_params.get("v") == version
+        else REVALIDATE_CACHE_CONTROL
+    )
+    return etag_response(
+        request,
+        icon,
+        etag=f'"{version}"',
+        media_type="image/jpeg",
+        cache_control=cache_control,
+    )
@@ -1,47 +1,165 @@
 """Модуль работы с коктейлями."""
 
-from fastapi import APIRouter, Form, Request
-from fastapi.responses import HTMLResponse
-from fasthtml.common import P, Tbody, fill_form, to_xml
-from sqlmodel import select
+from collections.abc import AsyncIterator, Sequence
+from typing import TypeVar
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Form,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import HTMLResponse, StreamingResponse
+from fasthtml.common import FT, NotStr, P, Tbody, to_xml
+from pydantic import ValidationError
 from typing_extensions import Annotated
 
-from app.api.deps import CocktailServiceDep, IngredientServiceDep, SessionDep
-from app.core.utils import convert_to_list_int
+from app.api.deps import (
+    CocktailServiceDep,
+    DraftStoreDep,
+    IngredientServiceDep,
+    conditional_get,
+    new_session,
+    shared_render,
+)
+from app.api.responses import icon_response
+from app.core.config import settings
 from app.html_services import CocktailHTMLService
+from app.html_services.utils import ROWS_PLACEHOLDER, stream_table
 from app.models import Ingredient
-from app.models.cocktail import CocktailCreate, CocktailUpdate
-from app.models.forms import FiltersFrom, SearchForm
+from app.models.cocktail import Cocktail, CocktailCreate, CocktailUpdate
+from app.models.forms import (
+    CocktailDraftForm,
+    ComponentForm,
+    FiltersFrom,
+    InventoryForm,
+    SearchForm,
+)
+from app.services import CocktailService
+from app.services.base import LoadStrategy
+from app.services.drafts import Components, DraftStore
 
 router = APIRouter()
 
+_CocktailForm = TypeVar("_CocktailForm", CocktailCreate, CocktailUpdate)
 
-@router.get("", response_class=HTMLResponse)
-def get_all_cocktails(
+
+def _next_page(cocktails: Sequence[Cocktail]) -> FT | None:
+    """Строка загрузки следующей страницы списка коктейлей."""
+    if len(cocktails) < settings.PAGE_SIZE:
+        return None
+    return CocktailHTMLService.next_page_view(
+        hx_get=f"/cocktails/page?after_id={cocktails[-1].id}",
+    )
+
+
+def _rows_view(
+    cocktails: Sequence[Cocktail],
+    next_page: FT | None,
+) -> tuple[FT | NotStr, ...]:
+    rows = CocktailHTMLService.rows_view(cocktails)
+    if next_page is None:
+        return (rows,)
+    return (rows, next_page)
+
+
+async def _stream_rows() -> AsyncIterator[NotStr]:
+    """HTML строк всех коктейлей пачками."""
+    # NOTE: Сессия зависимости закрывается до отправки тела ответа
+    async with new_session() as session:
+        service = CocktailService(session)
+        async for cocktails in service.stream_all(settings.STREAM_BATCH_SIZE):
+            yield CocktailHTMLService.rows_view(cocktails)
+
+
+@router.get(
+    "",
+    response_class=HTMLResponse,
+    dependencies=[Depends(conditional_get(Cocktail, Ingredient))],
+)
+async def get_all_cocktails(
+    response: Response,
     service: CocktailServiceDep,
     ingredient_service: IngredientServiceDep,
 ):
-    cocktails = service.get_all()
-    ingredients = ingredient_service.get_all()
-    content = CocktailHTMLService.all_view(cocktails, ingredients)
-    return to_xml(content)
+    catalog = await ingredient_service.get_catalog()
+    if settings.STREAM_LISTS:
+        content = CocktailHTMLService.all_view(
+            (),
+            catalog.ingredients,
+            next_page=ROWS_PLACEHOLDER,
+            search_on_load=False,
+        )
+        return StreamingResponse(
+            stream_table(content, _stream_rows()),
+            media_type="text/html",
+            headers=response.headers,
+        )
+
+    async def _render() -> str:
+        cocktails = await service.get_page()
+        content = CocktailHTMLService.all_view(
+            cocktails,
+            catalog.ingredients,
+            next_page=_next_page(cocktails),
+        )
+        return to_xml(content)
+
+    return await shared_render(("cocktails",), (Cocktail, Ingredient), _render)
+
+
+@router.get(
+    "/page",
+    response_class=HTMLResponse,
+    dependencies=[Depends(conditional_get(Cocktail))],
+)
+async def get_cocktails_page(after_id: int, service: CocktailServiceDep):
+    async def _render() -> str:
+        cocktails = await service.get_page(after_id)
+        return to_xml(_rows_view(cocktails, _next_page(cocktails)))
+
+    return await shared_render(("cocktails.page", after_id), (Cocktail,), _render)
 
 
 @router.post("/search", response_class=HTMLResponse)
-def search_cocktail(
+async def search_cocktail(
     form: Annotated[SearchForm, Form()],
     service: CocktailServiceDep,
 ):
     # https://gallery.fastht.ml/app/dynamic_user_interface_(htmx)/active_search/
     # https://gallery.fastht.ml/code/dynamic_user_interface_(htmx)/active_search
-    cocktails = service.search(form.search)
-
-    return to_xml(
-        Tbody(
-            *[CocktailHTMLService.row_view(i) for i in cocktails],
-            id="cocktail-list",
-            hx_swap_oob="true",
-        ),
+    value = form.search or None
+
+    async def _render() -> str:
+        cocktails = await service.search(
+            value,
+            after=form.after,
+            limit=settings.SEARCH_LIMIT,
+        )
+
+        next_page = None
+        if len(cocktails) == settings.SEARCH_LIMIT:
+            after_rank, after_id = service.search_cursor(cocktails[-1], value)
+            next_page = CocktailHTMLService.next_page_view(
+                hx_post="/cocktails/search",
+                hx_include="[name='search']",
+                hx_vals={"after_rank": after_rank, "after_id": after_id},
+            )
+
+        rows = _rows_view(cocktails, next_page)
+        if form.after is not None:
+            return to_xml(rows)
+        return to_xml(Tbody(*rows, id="cocktail-list", hx_swap_oob="true"))
+
+    # NOTE: Пустой поиск отправляется всеми клиентами при загрузке страницы
+    return await shared_render(
+        ("cocktails.search", value, form.after),
+        (Cocktail,),
+        _render,
     )
 
 
@@ -50,20 +168,75 @@ async def filter_cocktail(
     form: Annotated[FiltersFrom, Form()],
     service: CocktailServiceDep,
 ):
-    cocktails = service.filter_all(form)
-
-    return to_xml(
-        Tbody(
-            *[CocktailHTMLService.row_view(i) for i in cocktails],
-            id="cocktail-list",
-            hx_swap_oob="true",
-        ),
+    async def _render() -> str:
+        cocktails = await service.filter_all(
+            form,
+            after_id=form.after_id,
+            limit=settings.PAGE_SIZE,
+        )
+
+        next_page = None
+        if len(cocktails) == settings.PAGE_SIZE:
+            next_page = CocktailHTMLService.next_page_view(
+                hx_post="/cocktails/filter",
+                hx_include="#ingredient-filter",
+                hx_vals={"after_id": cocktails[-1].id},
+            )
+
+        rows = _rows_view(cocktails, next_page)
+        if form.after_id is not None:
+            return to_xml(rows)
+        return to_xml(Tbody(*rows, id="cocktail-list", hx_swap_oob="true"))
+
+    # NOTE: Удаление ингредиента меняет состав коктейлей
+    return await shared_render(
+        ("cocktails.filter", frozenset(form.filters or ()), form.after_id),
+        (Cocktail, Ingredient),
+        _render,
     )
 
 
-@router.get("/{item_id:int}", response_class=HTMLResponse)
-def get_cocktail(item_id: int, service: CocktailServiceDep):
-    cocktail = service.get(item_id)
+@router.post("/makeable", response_class=HTMLResponse)
+async def rank_cocktails_by_inventory(
+    form: Annotated[InventoryForm, Form()],
+    service: CocktailServiceDep,
+):
+    # Сначала коктейли, которые можно приготовить полностью, затем
+    # коктейли без 1, 2, ... ингредиентов
+    ranked = await service.rank_by_inventory(
+        form,
+        after=form.after,
+        limit=settings.PAGE_SIZE,
+    )
+
+    next_page = None
+    if len(ranked) == settings.PAGE_SIZE:
+        cocktail, missing = ranked[-1]
+        next_page = CocktailHTMLService.next_page_view(
+            hx_post="/cocktails/makeable",
+            hx_vals={
+                "ingredients": form.ingredients or [],
+                "max_missing": form.max_missing,
+                "after_missing": missing,
+                "after_id": cocktail.id,
+            },
+        )
+
+    rows = CocktailHTMLService.ranked_rows_view(ranked, form.after_missing)
+    if next_page is not None:
+        rows.append(next_page)
+    if form.after is not None:
+        return to_xml(tuple(rows))
+    return to_xml(Tbody(*rows, id="cocktail-list", hx_swap_oob="true"))
+
+
+@router.get(
+    "/{item_id:int}",
+    response_class=HTMLResponse,
+    dependencies=[Depends(conditional_get(Ingredient, item=Cocktail))],
+)
+async def get_cocktail(item_id: int, service: CocktailServiceDep):
+    cocktail = await service.get(item_id, LoadStrategy.JOINED)
     if not cocktail:
         return to_xml(P("Коктейль не найден"))
 
@@ -71,101 +244,141 @@ def get_cocktail(item_id: int, service: CocktailServiceDep):
     return to_xml(content)
 
 
+@router.get("/{item_id:int}/icon")
+async def get_cocktail_icon(
+    item_id: int,
+    request: Request,
+    service: CocktailServiceDep,
+):
+    icon = await service.get_icon(item_id)
+    return icon_response(request, icon)
+
+
 @router.get("/{item_id:int}/edit", response_class=HTMLResponse)
-def edit_cocktail(
+async def edit_cocktail(
     item_id: int,
     cocktail_service: CocktailServiceDep,
     ingredient_service: IngredientServiceDep,
+    drafts: DraftStoreDep,
 ):
-    cocktail = cocktail_service.get(item_id)
+    cocktail = await cocktail_service.get(item_id, LoadStrategy.JOINED)
     if cocktail is None:
         msg = "Доделать ошибку"
         raise ValueError(msg)
-    ingredients = ingredient_service.get_all()
+    catalog = await ingredient_service.get_catalog()
+    draft = drafts.create({i.ingredient_id: i.quantity for i in cocktail.components})
 
-    content = CocktailHTMLService.update_view(cocktail, ingredients)
+    content = CocktailHTMLService.update_view(cocktail, catalog.ingredients, draft)
     return to_xml(content)
 
 
-@router.get("/add/form", response_class=HTMLResponse)
-async def get_form(session: SessionDep, request: Request):
-    # удаляемый компонент коктейля, если есть
-    deleted_id: str | int | None = request.query_params.get("deleted-id")
-    if deleted_id is not None:
-        deleted_id = int(deleted_id)
-
-    # новый компонент коктейля
-    ingredient_name = request.query_params.get("ingredient")
-    quantity = request.query_params.get("quantity")
-
-    # уже добавленные компоненты
-    ingredients_id = convert_to_list_int(request.query_params.get("ingredients", ""))
-    quantities = convert_to_list_int(request.query_params.get("quantities", ""))
-
-    all_ingredients = session.exec(select(Ingredient)).all()
-    # NOTE: if i.id для корректной аннотации
-    ingredients_map = {i.name: i.id for i in all_ingredients if i.id}
-
-    if not deleted_id:
-        if not ingredient_name or not quantity:
-            msg = "Доделать"
-            raise ValueError(msg)
-
-        if ingredient_name not in ingredients_map:
-            # ингридиент не найден
-            msg = "Доделать"
-            raise ValueError(msg)
-
-        # Добавление нового компонента к уже добавленным ранее
-        ingredients_id.append(ingredients_map[ingredient_name])
-        quantities.append(int(quantity))
-    else:
-        if deleted_id in ingredients_id:
-            idx = ingredients_id.index(deleted_id)
-            ingredients_id.remove(deleted_id)
-            quantities.pop(idx)
-
-    ingredients_map_by_id = {i.id: i for i in all_ingredients}
-
-    cocktail_id: str | int | None = request.query_params.get("cocktail-id")
-    if cocktail_id:
-        cocktail_id = int(cocktail_id)
-    else:
-        cocktail_id = None
-
-    form = CocktailHTMLService.edit_form(
-        ingredients=[i for i in all_ingredients if i.id not in set(ingredients_id)],
-        components=list(
-            zip([ingredients_map_by_id[i] for i in ingredients_id], quantities)
-        ),
-        item_id=cocktail_id,
-    )
-
-    return to_xml(
-        fill_form(
-            form,
+def _get_draft(drafts: DraftStore, draft: str) -> Components:
+    components = drafts.get(draft)
+    if components is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Черновик не найден, откройте форму заново",
+        )
+    return components
+
+
+def _from_draft(
+    model: type[_CocktailForm],
+    form: CocktailDraftForm,
+    drafts: DraftStore,
+) -> _CocktailForm:
+    """Данные коктейля из формы и состава черновика."""
+    components = _get_draft(drafts, form.draft)
+    try:
+        return model.model_validate(
             {
-                "name": request.query_params.get("name"),
-                "description": request.query_params.get("description"),
+                "name": form.name,
+                "description": form.description,
+                "ingredients": list(components),
+                "quantities": list(components.values()),
             },
-        ),
+        )
+    except ValidationError as e:
+        raise RequestValidationError(e.errors()) from e
+
+
+@router.post("/drafts/{draft}/components", response_class=HTMLResponse)
+async def add_draft_component(
+    draft: str,
+    form: Annotated[ComponentForm, Form()],
+    service: IngredientServiceDep,
+    drafts: DraftStoreDep,
+):
+    components = _get_draft(drafts, draft)
+    catalog = await service.get_catalog()
+
+    ingredient_id = catalog.by_name.get(form.ingredient)
+    if ingredient_id is None:
+        # ингридиент не найден
+        msg = "Доделать"
+        raise ValueError(msg)
+
+    is_new = ingredient_id not in components
+    components[ingredient_id] = form.quantity
+    drafts.save(draft, components)
+
+    component = [(catalog.by_id[ingredient_id], form.quantity)]
+    if not is_new:
+        # Замена уже добавленного компонента
+        (item,) = CocktailHTMLService.get_ingredients_list(
+            component, draft, hx_swap_oob="true"
+        )
+        return to_xml(item)
+
+    (item,) = CocktailHTMLService.get_ingredients_list(component, draft)
+    if len(components) > 1:
+        return to_xml(item)
+    label = CocktailHTMLService.components_label(
+        draft, is_empty=False, hx_swap_oob="true"
     )
+    return to_xml((item, label))
+
+
+@router.delete(
+    "/drafts/{draft}/components/{ingredient_id:int}",
+    response_class=HTMLResponse,
+)
+async def delete_draft_component(
+    draft: str,
+    ingredient_id: int,
+    drafts: DraftStoreDep,
+):
+    components = _get_draft(drafts, draft)
+    components.pop(ingredient_id, None)
+    drafts.save(draft, components)
+
+    if components:
+        return ""
+    label = CocktailHTMLService.components_label(
+        draft, is_empty=True, hx_swap_oob="true"
+    )
+    return to_xml(label)
 
 
 @router.get("/add", response_class=HTMLResponse)
-def get_create_cocktail_form(service: IngredientServiceDep):
-    ingredients = service.get_all()
+async def get_create_cocktail_form(
+    service: IngredientServiceDep,
+    drafts: DraftStoreDep,
+):
+    catalog = await service.get_catalog()
 
-    content = CocktailHTMLService.create_view(ingredients)
+    content = CocktailHTMLService.create_view(catalog.ingredients, drafts.create())
     return to_xml(content)
 
 
 @router.post("", response_class=HTMLResponse)
 async def create_cocktail(
-    form: Annotated[CocktailCreate, Form()],
+    form: Annotated[CocktailDraftForm, Form()],
     service: CocktailServiceDep,
+    drafts: DraftStoreDep,
 ):
-    new_cocktail = service.create(form)
+    new_cocktail = await service.create(_from_draft(CocktailCreate, form, drafts))
+    drafts.delete(form.draft)
     content = CocktailHTMLService.row_view(new_cocktail, hx_swap="beforeend")
     return to_xml(content)
 
@@ -173,16 +386,18 @@ async def create_cocktail(
 @router.patch("/{item_id:int}", response_class=HTMLResponse)
 async def update_cocktail(
     item_id: int,
-    form: Annotated[CocktailUpdate, Form()],
+    form: Annotated[CocktailDraftForm, Form()],
     service: CocktailServiceDep,
+    drafts: DraftStoreDep,
 ):
-    cocktail = service.update(item_id, form)
+    cocktail = await service.update(item_id, _from_draft(CocktailUpdate, form, drafts))
+    drafts.delete(form.draft)
     content = CocktailHTMLService.row_view(cocktail, hx_swap_oob="true")
     return to_xml(content)
 
 
 @router.delete("/{item_id:int}", response_class=HTMLResponse)
-def delete_cocktail(item_id: int, service: CocktailServiceDep):
-    service.delete(item_id)
+async def delete_cocktail(item_id: int, service: CocktailServiceDep):
+    await service.delete(item_id)
     content = CocktailHTMLService.delete_view(item_id)
     return to_xml(content)
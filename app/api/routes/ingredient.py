@@ -1,29 +1,122 @@
 """Модуль работы с ингредиентами."""
 
-from fastapi import APIRouter, Form
-from fastapi.responses import HTMLResponse
-from fasthtml.common import P, to_xml
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import contextmanager
+
+from fastapi import APIRouter, Depends, Form, HTTPException, Request, Response, status
+from fastapi.responses import HTMLResponse, StreamingResponse
+from fasthtml.common import FT, NotStr, P, to_xml
+from psycopg.errors import UniqueViolation
+from sqlalchemy.exc import IntegrityError
 from typing_extensions import Annotated
 
-from app.api.deps import IngredientServiceDep
+from app.api.deps import (
+    IngredientServiceDep,
+    conditional_get,
+    new_session,
+    shared_render,
+)
+from app.api.responses import icon_response
+from app.core.config import settings
 from app.html_services import IngredientHTMLService
-from app.models.ingredient import IngredientCreate, IngredientUpdate
+from app.html_services.utils import ROWS_PLACEHOLDER, stream_table
+from app.models.ingredient import Ingredient, IngredientCreate, IngredientUpdate
+from app.services import IngredientService
 
 router = APIRouter()
 
 
-@router.get("", response_class=HTMLResponse)
-def get_all_ingredients(service: IngredientServiceDep):
-    """Сформировать HTML для просмотра всех ингредиентов."""
-    ingredients = service.get_all()
-    content = IngredientHTMLService().all_view(ingredients)
-    return to_xml(content)
-
-
-@router.get("/{item_id:int}", response_class=HTMLResponse)
-def get_ingredient(item_id: int, service: IngredientServiceDep):
+def _next_page(ingredients: Sequence[Ingredient]) -> FT | None:
+    """Строка загрузки следующей страницы списка ингредиентов."""
+    if len(ingredients) < settings.PAGE_SIZE:
+        return None
+    return IngredientHTMLService().next_page_view(
+        hx_get=f"/ingredients/page?after_id={ingredients[-1].id}",
+    )
+
+
+@contextmanager
+def _unique_name() -> Iterator[None]:
+    """Ответ `409` при совпадении названия с другим ингредиентом."""
+    try:
+        yield
+    except IntegrityError as e:
+        if not (
+            isinstance(e.orig, UniqueViolation)
+            and e.orig.diag.constraint_name == "uq_ingredient_name"
+        ):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Ингредиент с таким названием уже существует",
+        ) from e
+
+
+async def _stream_rows() -> AsyncIterator[NotStr]:
+    """HTML строк всех ингредиентов пачками."""
+    # NOTE: Сессия зависимости закрывается до отправки тела ответа
+    async with new_session() as session:
+        service = IngredientService(session)
+        async for ingredients in service.stream_all(settings.STREAM_BATCH_SIZE):
+            yield IngredientHTMLService().rows_view(ingredients)
+
+
+@router.get(
+    "",
+    response_class=HTMLResponse,
+    dependencies=[Depends(conditional_get(Ingredient))],
+)
+async def get_all_ingredients(response: Response, service: IngredientServiceDep):
+    """Сформировать HTML для просмотра первой страницы ингредиентов.
+
+    При `STREAM_LISTS` вся таблица передается потоком.
+    """
+    if settings.STREAM_LISTS:
+        content = IngredientHTMLService().all_view((), next_page=ROWS_PLACEHOLDER)
+        return StreamingResponse(
+            stream_table(content, _stream_rows()),
+            media_type="text/html",
+            headers=response.headers,
+        )
+
+    async def _render() -> str:
+        ingredients = await service.get_page()
+        content = IngredientHTMLService().all_view(
+            ingredients,
+            next_page=_next_page(ingredients),
+        )
+        return to_xml(content)
+
+    return await shared_render(("ingredients",), (Ingredient,), _render)
+
+
+@router.get(
+    "/page",
+    response_class=HTMLResponse,
+    dependencies=[Depends(conditional_get(Ingredient))],
+)
+async def get_ingredients_page(after_id: int, service: IngredientServiceDep):
+    """Сформировать HTML строк следующей страницы ингредиентов."""
+
+    async def _render() -> str:
+        ingredients = await service.get_page(after_id)
+        rows = IngredientHTMLService().rows_view(ingredients)
+        next_page = _next_page(ingredients)
+        if next_page is None:
+            return to_xml(rows)
+        return to_xml((rows, next_page))
+
+    return await shared_render(("ingredients.page", after_id), (Ingredient,), _render)
+
+
+@router.get(
+    "/{item_id:int}",
+    response_class=HTMLResponse,
+    dependencies=[Depends(conditional_get(item=Ingredient))],
+)
+async def get_ingredient(item_id: int, service: IngredientServiceDep):
     """Сформировать HTML для просмотра ингредиента по ID."""
-    ingredient = service.get(item_id)
+    ingredient = await service.get(item_id)
     if not ingredient:
         return to_xml(P("Коктейль не найден"))
 
@@ -31,29 +124,49 @@ def get_ingredient(item_id: int, service: IngredientServiceDep):
     return to_xml(content)
 
 
-@router.get("/create-form", response_class=HTMLResponse)
-def get_create_ingredient_form():
+@router.get("/{item_id:int}/icon")
+async def get_ingredient_icon(
+    item_id: int,
+    request: Request,
+    service: IngredientServiceDep,
+):
+    """Иконка ингредиента по ID."""
+    icon = await service.get_icon(item_id)
+    return icon_response(request, icon)
+
+
+@router.get(
+    "/create-form",
+    response_class=HTMLResponse,
+    dependencies=[Depends(conditional_get())],
+)
+async def get_create_ingredient_form():
     """Сформировать HTML формы для создания ингредиента."""
     content = IngredientHTMLService().create_view()
     return to_xml(content)
 
 
 @router.post("", response_class=HTMLResponse)
-def create_ingredient(
+async def create_ingredient(
     ingredient_data: Annotated[IngredientCreate, Form()],
     service: IngredientServiceDep,
 ):
     """Создать новый ингредиент."""
-    ingredient = service.create(ingredient_data)
+    with _unique_name():
+        ingredient = await service.create(ingredient_data)
 
     content = IngredientHTMLService().row_view(ingredient, hx_swap="beforeend")
     return to_xml(content)
 
 
-@router.get("/{item_id:int}/edit-form", response_class=HTMLResponse)
-def get_edit_ingredient_form(item_id: int, service: IngredientServiceDep):
+@router.get(
+    "/{item_id:int}/edit-form",
+    response_class=HTMLResponse,
+    dependencies=[Depends(conditional_get(item=Ingredient))],
+)
+async def get_edit_ingredient_form(item_id: int, service: IngredientServiceDep):
     """Сформировать HTML формы для обновления ингредиента."""
-    ingredient = service.get(item_id)
+    ingredient = await service.get(item_id)
     if ingredient is None:
         msg = "Доделать"
         raise ValueError(msg)
@@ -63,22 +176,23 @@ def get_edit_ingredient_form(item_id: int, service: IngredientServiceDep):
 
 
 @router.patch("/{item_id:int}", response_class=HTMLResponse)
-def update_ingredient(
+async def update_ingredient(
     item_id: int,
     ingredient_data: Annotated[IngredientUpdate, Form()],
     service: IngredientServiceDep,
 ):
     """Обновить существующий ингредиент по ID."""
-    ingredient = service.update(item_id, ingredient_data)
+    with _unique_name():
+        ingredient = await service.update(item_id, ingredient_data)
 
     content = IngredientHTMLService().row_view(ingredient, hx_swap_oob="true")
     return to_xml(content)
 
 
 @router.delete("/{item_id:int}", response_class=HTMLResponse)
-def delete_ingredient(item_id: int, service: IngredientServiceDep):
+async def delete_ingredient(item_id: int, service: IngredientServiceDep):
     """Удалить ингредиент по ID."""
     # TODO: Проверка на участие в коктейлях
-    service.delete(item_id)
+    await service.delete(item_id)
     content = IngredientHTMLService().delete_view(item_id)
     return to_xml(content)
@@ -1,9 +1,11 @@
+from collections.abc import Callable, Sequence
 from pathlib import Path
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
 from fasthtml.common import (
     AX,
+    FT,
     H1,
     Body,
     Button,
@@ -20,49 +22,85 @@ from fasthtml.common import (
     NotStr,
     P,
     Script,
-    ScriptX,
-    StyleX,
     Title,
     Ul,
     def_hdrs,
     to_xml,
 )
 
-from app.api.const import THEME_ICON_32
+from app.api.const import ICON_SPRITE, THEME_ICON_32
+from app.api.responses import etag_response
+from app.core.assets import STATIC_DIR, static_assets
+from app.core.config import settings
+from app.core.utils import content_hash
 
 router = APIRouter()
 
+# Файлы, подключаемые в оболочке страницы по адресам с хешем содержимого
+SHELL_FILES = (
+    STATIC_DIR / "css/my_css.css",
+    STATIC_DIR / "css/yoSelect.css",
+    STATIC_DIR / "js/yoSelect.js",
+    STATIC_DIR / "js/minimal-theme-switcher.js",
+    STATIC_DIR / "js/modal.js",
+)
 
-@router.get("/", response_class=HTMLResponse)
-def default():
-    path = Path(__file__).parent.parent.parent
+
+def _vendored(*items: FT) -> tuple[FT, ...]:
+    """Копии тегов с адресами локальных копий вместо адресов сторонних файлов.
+
+    Теги копируются, т.к. `def_hdrs` возвращает общие для всех вызовов
+    объекты.
+    """
+    return tuple(
+        FT(
+            item.tag,
+            item.children,
+            {
+                key: static_assets.vendor_url(value)
+                if key in ("src", "href")
+                else value
+                for key, value in item.attrs.items()
+            },
+            void_=item.void_,
+        )
+        for item in items
+    )
+
+
+def render_shell() -> str:
+    """HTML оболочка страницы."""
+    static_assets.load()
     content = Html(
         Head(
-            *def_hdrs(),
+            *_vendored(*def_hdrs()),
             Meta(content="light dark", name="color-scheme"),
             Title("Рецепты коктейлей"),
-            Script(
-                src="https://unpkg.com/htmx.org@2.0.4",
-                integrity="sha384-HGfztofotfshcF7+8n44JQL2oJmowVChPTg48S+jvZoztPfvwD79OC/LTtG6dMp+",
-                crossorigin="anonymous",
-            ),
-            Link(
-                rel="stylesheet",
-                href="https://cdn.jsdelivr.net/gh/Yohn/PicoCSS@2.2.10/css/pico.min.css",
-            ),
-            Link(
-                rel="stylesheet",
-                href="https://cdn.jsdelivr.net/npm/theme-toggles@4.10.1/css/classic.min.css",
-            ),
-            Link(
-                rel="stylesheet",
-                href="https://cdn.jsdelivr.net/npm/@picocss/pico@2/css/pico.colors.min.css",
+            *_vendored(
+                Script(
+                    src="https://unpkg.com/htmx.org@2.0.4",
+                    integrity="sha384-HGfztofotfshcF7+8n44JQL2oJmowVChPTg48S+jvZoztPfvwD79OC/LTtG6dMp+",
+                    crossorigin="anonymous",
+                ),
+                Link(
+                    rel="stylesheet",
+                    href="https://cdn.jsdelivr.net/gh/Yohn/PicoCSS@2.2.10/css/pico.min.css",
+                ),
+                Link(
+                    rel="stylesheet",
+                    href="https://cdn.jsdelivr.net/npm/theme-toggles@4.10.1/css/classic.min.css",
+                ),
+                Link(
+                    rel="stylesheet",
+                    href="https://cdn.jsdelivr.net/npm/@picocss/pico@2/css/pico.colors.min.css",
+                ),
             ),
-            StyleX(path / "static/css/my_css.css"),
-            StyleX(path / "static/css/yoSelect.css"),
-            ScriptX(path / "static/js/yoSelect.js"),
+            Link(rel="stylesheet", href=static_assets.url("css/my_css.css")),
+            Link(rel="stylesheet", href=static_assets.url("css/yoSelect.css")),
+            Script(src=static_assets.url("js/yoSelect.js")),
         ),
         Body(
+            ICON_SPRITE,
             Header(
                 Nav(
                     Ul(
@@ -117,8 +155,53 @@ def default():
                 hx_trigger="load",
                 hx_swap="outerHTML",
             ),
-            ScriptX(path / "static/js/minimal-theme-switcher.js"),
-            ScriptX(path / "static/js/modal.js"),
+            Script(src=static_assets.url("js/minimal-theme-switcher.js")),
+            Script(src=static_assets.url("js/modal.js")),
         ),
     )
     return to_xml(content)
+
+
+class PageShell:
+    """Заранее собранная оболочка страницы.
+
+    Оболочка собирается при первом запросе. При `watch` она пересобирается
+    после изменения встраиваемых файлов (по времени модификации).
+    """
+
+    def __init__(
+        self,
+        render: Callable[[], str],
+        files: Sequence[Path],
+        *,
+        watch: bool = False,
+    ) -> None:
+        self.render = render
+        self.files = files
+        self.watch = watch
+        self._mtimes: tuple[float, ...] | None = None
+        self._content = b""
+        self._etag = ""
+
+    def get(self) -> tuple[bytes, str]:
+        """Содержимое оболочки и его ETag."""
+        if self._mtimes is None or self.watch:
+            mtimes = tuple(i.stat().st_mtime for i in self.files)
+            if mtimes != self._mtimes:
+                self._content = self.render().encode()
+                self._etag = f'"{content_hash(self._content)}"'
+                self._mtimes = mtimes
+        return self._content, self._etag
+
+
+page_shell = PageShell(
+    render_shell,
+    files=SHELL_FILES,
+    watch=settings.ENVIRONMENT == "local",
+)
+
+
+@router.get("/", response_class=HTMLResponse)
+def default(request: Request):
+    content, etag = page_shell.get()
+    return etag_response(request, content, etag=etag, media_type="text/html")
@@ -0,0 +1,45 @@
+"""Модуль раздачи статических файлов."""
+
+from fastapi import APIRouter, Request, Response
+
+from app.api.responses import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    accepted_encodings,
+    etag_response,
+)
+from app.core.assets import static_assets
+
+router = APIRouter()
+
+# Кодировки в порядке предпочтения
+_ENCODINGS = ("br", "gzip")
+
+
+@router.get("/{path:path}")
+def get_static(path: str, request: Request) -> Response:
+    found = static_assets.find(path)
+    if found is None:
+        return Response(status_code=404)
+    asset, is_hashed = found
+
+    accepted = accepted_encodings(request)
+    encoding = next(
+        (i for i in _ENCODINGS if i in accepted and i in asset.variants),
+        "identity",
+    )
+    headers = {"Vary": "Accept-Encoding"}
+    etag = f'"{asset.digest}"'
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+        etag = f'"{asset.digest}-{encoding}"'
+
+    cache_control = IMMUTABLE_CACHE_CONTROL if is_hashed else REVALIDATE_CACHE_CONTROL
+    return etag_response(
+        request,
+        asset.variants[encoding],
+        etag=etag,
+        media_type=asset.media_type,
+        cache_control=cache_control,
+        headers=headers,
+    )
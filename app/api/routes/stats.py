@@ -0,0 +1,41 @@
+"""Модуль служебной статистики приложения."""
+
+from fastapi import APIRouter
+
+from app.core.cache import query_cache
+from app.core.db import get_pool_stats
+from app.core.singleflight import render_flight
+from app.html_services.utils import row_cache
+from app.services.search import cocktail_search_results
+
+router = APIRouter()
+
+
+@router.get("/pool")
+def get_pool():
+    """Статистика пула соединений с базой данных."""
+    return get_pool_stats()
+
+
+@router.get("/cache")
+def get_cache():
+    """Статистика кеша результатов запросов."""
+    return query_cache.stats()
+
+
+@router.get("/rows")
+def get_row_cache():
+    """Статистика кеша HTML строк таблиц."""
+    return row_cache.stats()
+
+
+@router.get("/singleflight")
+def get_render_flight():
+    """Статистика объединения одинаковых одновременных запросов."""
+    return render_flight.stats()
+
+
+@router.get("/search")
+def get_search_results():
+    """Статистика кеша наборов результатов поиска."""
+    return cocktail_search_results.stats()
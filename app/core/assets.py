@@ -0,0 +1,179 @@
+"""Модуль статических файлов.
+
+Файлы `app/static` раздаются по адресам с хешем содержимого
+(`/static/css/my_css.<хеш>.css`) и кешируются браузером без повторной
+проверки. Сжатые варианты (gzip и brotli при наличии пакета `brotli`)
+готовятся один раз при загрузке файлов.
+
+При `STATIC_VENDORED` сторонние файлы (htmx, PicoCSS и др.) раздаются из
+`app/static/vendor` вместо CDN. Загрузка копий: `python -m app.core.assets`
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import sys
+import urllib.request
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR: Final = Path(__file__).parent.parent / "static"
+STATIC_URL: Final = "/static"
+
+# Адрес на CDN -> путь копии относительно `STATIC_DIR`
+VENDOR_ASSETS: Final = {
+    "https://unpkg.com/htmx.org@2.0.4": "vendor/htmx-2.0.4.min.js",
+    "https://unpkg.com/htmx.org@next/dist/htmx.min.js": "vendor/htmx-next.min.js",
+    "https://cdn.jsdelivr.net/gh/answerdotai/fasthtml-js@1.0.4/fasthtml.js": (
+        "vendor/fasthtml-1.0.4.js"
+    ),
+    "https://cdn.jsdelivr.net/gh/answerdotai/surreal@main/surreal.js": (
+        "vendor/surreal.js"
+    ),
+    "https://cdn.jsdelivr.net/gh/gnat/css-scope-inline@main/script.js": (
+        "vendor/css-scope-inline.js"
+    ),
+    "https://cdn.jsdelivr.net/gh/Yohn/PicoCSS@2.2.10/css/pico.min.css": (
+        "vendor/pico-2.2.10.min.css"
+    ),
+    "https://cdn.jsdelivr.net/npm/theme-toggles@4.10.1/css/classic.min.css": (
+        "vendor/theme-toggles-4.10.1.min.css"
+    ),
+    "https://cdn.jsdelivr.net/npm/@picocss/pico@2/css/pico.colors.min.css": (
+        "vendor/pico-2.colors.min.css"
+    ),
+}
+
+# Типы содержимого, для которых готовятся сжатые варианты
+COMPRESSIBLE_TYPES: Final = ("text/", "application/javascript", "image/svg+xml")
+
+
+@dataclass(frozen=True, slots=True)
+class Asset:
+    """Статический файл со сжатыми вариантами."""
+
+    path: str
+    hashed_path: str
+    digest: str
+    media_type: str
+    # Кодировка ("identity", "gzip", "br") -> содержимое
+    variants: Mapping[str, bytes]
+
+
+def _hashed_path(path: str, digest: str) -> str:
+    """Путь с хешем содержимого перед расширением."""
+    stem, dot, suffix = path.rpartition(".")
+    if not dot or "/" in suffix:
+        return f"{path}.{digest}"
+    return f"{stem}.{digest}.{suffix}"
+
+
+def _compress(content: bytes, media_type: str) -> dict[str, bytes]:
+    variants = {"identity": content}
+    if not media_type.startswith(COMPRESSIBLE_TYPES):
+        return variants
+
+    compressed = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed["br"] = brotli.compress(content)
+    # NOTE: Сжатый вариант, не меньший исходного, не нужен
+    variants.update((k, v) for k, v in compressed.items() if len(v) < len(content))
+    return variants
+
+
+class StaticAssets:
+    """Статические файлы каталога, загруженные в память."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._by_path: dict[str, Asset] = {}
+        self._by_hashed_path: dict[str, Asset] = {}
+        self._loaded = False
+
+    def load(self) -> None:
+        """Прочитать файлы каталога и подготовить сжатые варианты."""
+        by_path = {}
+        for file_ in sorted(self.directory.rglob("*")):
+            if not file_.is_file():
+                continue
+            path = file_.relative_to(self.directory).as_posix()
+            content = file_.read_bytes()
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            by_path[path] = Asset(
+                path=path,
+                hashed_path=_hashed_path(path, digest),
+                digest=digest,
+                media_type=media_type,
+                variants=_compress(content, media_type),
+            )
+
+        self._by_path = by_path
+        self._by_hashed_path = {i.hashed_path: i for i in by_path.values()}
+        self._loaded = True
+
+    def find(self, path: str) -> tuple[Asset, bool] | None:
+        """Файл по пути и признак адреса с хешем содержимого."""
+        if not self._loaded:
+            self.load()
+        if path in self._by_hashed_path:
+            return self._by_hashed_path[path], True
+        if path in self._by_path:
+            return self._by_path[path], False
+        return None
+
+    def url(self, path: str) -> str:
+        """Адрес файла с хешем содержимого."""
+        found = self.find(path)
+        if found is None:
+            msg = f"Статический файл не найден: {path}"
+            raise FileNotFoundError(msg)
+        return f"{STATIC_URL}/{found[0].hashed_path}"
+
+    def vendor_url(self, url: str) -> str:
+        """Адрес локальной копии стороннего файла или исходный адрес."""
+        path = VENDOR_ASSETS.get(url)
+        if not settings.STATIC_VENDORED or path is None:
+            return url
+        if self.find(path) is None:
+            logger.warning("Нет локальной копии %s, используется CDN", url)
+            return url
+        return self.url(path)
+
+
+static_assets = StaticAssets(STATIC_DIR)
+
+
+def download_vendor_assets() -> None:
+    """Скачать сторонние файлы в `app/static/vendor`."""
+    for url, path in VENDOR_ASSETS.items():
+        target = STATIC_DIR / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            target.write_bytes(response.read())
+        print(f"{url} -> {target}")
+
+
+def main() -> None:
+    """Точка входа."""
+    try:
+        download_vendor_assets()
+    except OSError as e:
+        print(f"Ошибка загрузки: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
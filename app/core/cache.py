@@ -0,0 +1,151 @@
+"""Модуль кеша результатов запросов."""
+
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from typing import Any, Final, Protocol
+
+from app.core.config import settings
+
+# Признак отсутствия значения в кеше (`None` - допустимое значение)
+MISSING: Final = object()
+
+
+class Cache(Protocol):
+    """Кеш с инвалидацией записей по тегам."""
+
+    # Счетчик инвалидаций, см. `LRUCache.set`
+    epoch: int
+
+    def get(self, key: Hashable) -> Any: ...
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        tags: Iterable[Hashable] = (),
+        epoch: int | None = None,
+    ) -> None: ...
+
+    def delete(self, key: Hashable) -> None: ...
+
+    def invalidate(self, *tags: Hashable) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def stats(self) -> dict[str, int | float]: ...
+
+
+class LRUCache:
+    """LRU кеш с ограничением времени жизни записей.
+
+    Каждая запись помечается набором тегов, `invalidate` удаляет все записи с
+    указанными тегами.
+    """
+
+    epoch: int
+
+    def __init__(self, max_size: int, ttl: float | None = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: OrderedDict[Hashable, tuple[float, Any, frozenset[Hashable]]] = (
+            OrderedDict()
+        )
+        self._keys_by_tag: dict[Hashable, set[Hashable]] = {}
+
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Значение по ключу или `MISSING`."""
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return MISSING
+
+        expires_at, value, _ = item
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return MISSING
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        tags: Iterable[Hashable] = (),
+        epoch: int | None = None,
+    ) -> None:
+        """Сохранить значение с тегами.
+
+        `epoch` - значение `self.epoch` до чтения данных. Если с тех пор была
+        инвалидация, значение могло устареть и не сохраняется.
+        """
+        if self.max_size <= 0 or (epoch is not None and epoch != self.epoch):
+            return
+
+        if key in self._items:
+            self._remove(key)
+
+        expires_at = time.monotonic() + self.ttl if self.ttl else math.inf
+        item_tags = frozenset(tags)
+        self._items[key] = (expires_at, value, item_tags)
+        for tag in item_tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+
+        while len(self._items) > self.max_size:
+            self._remove(next(iter(self._items)))
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        if key in self._items:
+            self._remove(key)
+
+    def invalidate(self, *tags: Hashable) -> None:
+        self.epoch += 1
+        for tag in tags:
+            for key in self._keys_by_tag.pop(tag, ()):
+                if key in self._items:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        self.epoch += 1
+        self._items.clear()
+        self._keys_by_tag.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, tags = self._items.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[tag]
+
+
+query_cache = LRUCache(
+    max_size=settings.QUERY_CACHE_SIZE,
+    ttl=settings.QUERY_CACHE_TTL,
+)
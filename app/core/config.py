@@ -40,6 +40,64 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = 5432
     POSTGRES_DB: str = ""
 
+    # Database connection pool
+    POOL_SIZE: int = 5
+    POOL_MAX_OVERFLOW: int = 10
+    POOL_TIMEOUT: float = 30.0
+    POOL_RECYCLE: int = 1800
+    POOL_PRE_PING: bool = True
+    # NOTE: None отключает подготовленные выражения (нужно для pgbouncer)
+    POSTGRES_PREPARE_THRESHOLD: int | None = 5
+
+    # Проверка планов выполнения частых запросов при запуске
+    EXPLAIN_ON_STARTUP: bool = False
+
+    # Индекс ингредиентов коктейлей в памяти процесса
+    COCKTAIL_INDEX_ENABLED: bool = True
+
+    # Кеш результатов запросов (0 - кеш отключен)
+    QUERY_CACHE_SIZE: int = 1024
+    QUERY_CACHE_TTL: float | None = 300.0
+
+    # Уведомления об изменениях данных между процессами (LISTEN/NOTIFY)
+    CHANGE_NOTIFY_ENABLED: bool = True
+    CHANGE_NOTIFY_CHANNEL: str = "cocktail_db_changes"
+    CHANGE_NOTIFY_RECONNECT_DELAY: float = 5.0
+    # Ожидание подписки на уведомления перед построением индекса при запуске
+    CHANGE_NOTIFY_STARTUP_TIMEOUT: float = 10.0
+
+    # Сжатие ответов (zstd и br при наличии пакетов `zstandard` и `brotli`)
+    COMPRESSION_ENABLED: bool = True
+    # Ответы меньшего размера не сжимаются
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Локальные копии сторонних JS/CSS вместо CDN (`python -m app.core.assets`)
+    STATIC_VENDORED: bool = False
+
+    # Кеш HTML строк таблиц (0 - кеш отключен)
+    ROW_CACHE_SIZE: int = 10_000
+
+    # Черновики формы коктейля
+    DRAFT_STORE_SIZE: int = 10_000
+    DRAFT_TTL: float = 3600.0
+
+    # Постраничный вывод списков
+    PAGE_SIZE: int = 50
+    # Потоковая выдача всей таблицы на странице списка вместо первой страницы
+    STREAM_LISTS: bool = False
+    # Число записей, читаемых из серверного курсора за раз
+    STREAM_BATCH_SIZE: int = 500
+
+    # Поиск коктейлей
+    SEARCH_LIMIT: int = 100
+    # Полные наборы результатов для уточняющих запросов (0 - кеш отключен)
+    SEARCH_RESULTS_CACHE_SIZE: int = 64
+    # Наборы с большим числом коктейлей не сохраняются
+    SEARCH_RESULTS_MAX_ROWS: int = 500
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
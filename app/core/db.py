@@ -1,5 +1,92 @@
+import time
+from typing import Any
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 from sqlmodel import create_engine
 
 from app.core.config import settings
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+class _InstrumentedPoolMixin:
+    """Учет времени ожидания свободного соединения пула."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait_time = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """Пул соединений синхронного движка."""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """Пул соединений асинхронного движка."""
+
+
+_POOL_OPTIONS: dict[str, Any] = {
+    "pool_size": settings.POOL_SIZE,
+    "max_overflow": settings.POOL_MAX_OVERFLOW,
+    "pool_timeout": settings.POOL_TIMEOUT,
+    "pool_recycle": settings.POOL_RECYCLE,
+    "pool_pre_ping": settings.POOL_PRE_PING,
+    "connect_args": {"prepare_threshold": settings.POSTGRES_PREPARE_THRESHOLD},
+}
+
+# NOTE: Синхронный движок используется только при запуске (DDL и начальные данные)
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedQueuePool,
+    **_POOL_OPTIONS,
+)
+
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedAsyncQueuePool,
+    **_POOL_OPTIONS,
+)
+
+
+def _get_stats(pool: Pool) -> dict[str, int | float]:
+    if not isinstance(pool, InstrumentedQueuePool | InstrumentedAsyncQueuePool):
+        return {}
+
+    return {
+        "size": pool.size(),
+        "max_overflow": settings.POOL_MAX_OVERFLOW,
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "wait_time_total": pool.wait_time_total,
+        "wait_time_max": pool.wait_time_max,
+        "wait_time_avg": pool.wait_time_total / pool.checkouts
+        if pool.checkouts
+        else 0.0,
+    }
+
+
+def get_pool_stats() -> dict[str, dict[str, int | float]]:
+    """Текущее состояние пулов соединений."""
+    return {
+        "sync": _get_stats(engine.pool),
+        "async": _get_stats(async_engine.pool),
+    }
@@ -1,6 +1,34 @@
-from sqlmodel import Session, select
+import json
 
-from app.models import Ingredient
+from sqlalchemy import Connection, Engine, UniqueConstraint, func, inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.schema import AddConstraint, CreateColumn, CreateIndex, CreateTable
+from sqlmodel import Session, col, select
+
+from app.core.utils import content_hash
+from app.models import Base, DbState, Ingredient
+
+FINGERPRINT_KEY = "fingerprint"
+# Произвольный ключ advisory блокировки инициализации БД
+INIT_DB_LOCK_ID = 4_127_001
+
+# Устранение дубликатов перед добавлением уникального ограничения в
+# существующую таблицу
+DEDUPLICATE = {
+    # Одноименные ингредиенты могут использоваться в коктейлях, поэтому они
+    # не удаляются, а переименовываются
+    "uq_ingredient_name": (
+        "UPDATE ingredient SET name = left(name, 490) || ' (' || id || ')' "
+        "WHERE id NOT IN (SELECT min(id) FROM ingredient GROUP BY name)"
+    ),
+    # Из повторяющихся компонентов коктейля остается первый
+    "uq_component_cocktail_ingredient": (
+        "DELETE FROM component AS a USING component AS b "
+        "WHERE a.cocktail_id = b.cocktail_id "
+        "AND a.ingredient_id = b.ingredient_id AND a.id > b.id"
+    ),
+}
 
 INGREDIENTS = [
     {
@@ -190,12 +218,126 @@ INGREDIENTS = [
 
 
 def init_db(session: Session) -> None:
-    current_ingredients = set(session.exec(select(Ingredient.name)))
+    """Добавить недостающие ингредиенты одним запросом."""
+    values = [
+        Ingredient.model_validate(item).model_dump(exclude={"id"})
+        for item in INGREDIENTS
+    ]
+    query = (
+        insert(Ingredient)
+        .values(values)
+        .on_conflict_do_nothing(index_elements=[col(Ingredient.name)])
+    )
+    session.exec(query)  # type: ignore[call-overload]
+
+
+def get_fingerprint() -> str:
+    """Отпечаток схемы БД и начальных данных."""
+    dialect = postgresql.dialect()
+    ddl = []
+    for table in Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        ddl.extend(
+            str(CreateIndex(index).compile(dialect=dialect))
+            for index in sorted(table.indexes, key=lambda i: str(i.name))
+        )
+    payload = json.dumps(
+        [ddl, INGREDIENTS, DEDUPLICATE],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return content_hash(payload.encode())
+
+
+def add_missing_columns(connection: Connection) -> None:
+    """Добавить в существующие таблицы новые колонки моделей.
+
+    `create_all` не изменяет существующие таблицы. Новые колонки должны быть
+    nullable или иметь значение по умолчанию на стороне сервера.
+    """
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {i["name"] for i in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = CreateColumn(column).compile(dialect=connection.dialect)
+            connection.exec_driver_sql(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN IF NOT EXISTS {ddl}",
+            )
+
+
+def add_missing_constraints(connection: Connection) -> None:
+    """Добавить в существующие таблицы новые уникальные ограничения и индексы.
+
+    `create_all` не изменяет существующие таблицы. Перед добавлением
+    ограничения устраняются дубликаты, см. `DEDUPLICATE`.
+    """
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {i["name"] for i in inspector.get_unique_constraints(table.name)}
+        for constraint in table.constraints:
+            if (
+                not isinstance(constraint, UniqueConstraint)
+                or constraint.name is None
+                or constraint.name in existing
+            ):
+                continue
+            deduplicate = DEDUPLICATE.get(str(constraint.name))
+            if deduplicate is not None:
+                connection.exec_driver_sql(deduplicate)
+            connection.execute(AddConstraint(constraint))
+
+        for index in table.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _is_current(connection: Connection, fingerprint: str) -> bool:
+    if not inspect(connection).has_table(DbState.__tablename__):
+        return False
+
+    query = select(DbState.value).where(DbState.key == FINGERPRINT_KEY)
+    return connection.execute(query).scalar() == fingerprint
+
+
+def prepare_db(engine: Engine) -> bool:
+    """Создать схему и начальные данные, если БД не актуальна.
+
+    Возвращает `True`, если схема или данные были обновлены.
+    """
+    fingerprint = get_fingerprint()
+    with engine.connect() as connection:
+        if _is_current(connection, fingerprint):
+            return False
+
+    with Session(engine) as session:
+        # NOTE: Воркеры, запущенные одновременно, ждут первого и не выполняют
+        # DDL повторно
+        session.exec(select(func.pg_advisory_xact_lock(INIT_DB_LOCK_ID)))
+        connection = session.connection()
+        if _is_current(connection, fingerprint):
+            return False
 
-    for item in INGREDIENTS:
-        ingredient = Ingredient.model_validate(item)
+        Base.metadata.create_all(connection)
+        add_missing_columns(connection)
+        add_missing_constraints(connection)
+        init_db(session)
 
-        if ingredient.name not in current_ingredients:
-            session.add(ingredient)
+        query = (
+            insert(DbState)
+            .values(key=FINGERPRINT_KEY, value=fingerprint)
+            .on_conflict_do_update(
+                index_elements=[col(DbState.key)],
+                set_={"value": fingerprint},
+            )
+        )
+        session.exec(query)  # type: ignore[call-overload]
+        session.commit()
 
-    session.commit()
+    return True
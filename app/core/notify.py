@@ -0,0 +1,100 @@
+"""Модуль уведомлений об изменениях данных между процессами.
+
+Сервисы отправляют `NOTIFY` в транзакции записи, поэтому уведомление
+доставляется только после ее фиксации. Каждый процесс слушает канал и
+сбрасывает свои кеши при изменениях, сделанных другими процессами.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Final, NamedTuple
+
+import psycopg
+from psycopg import sql
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Идентификатор процесса, свои уведомления процесс пропускает
+ORIGIN: Final = uuid.uuid4().hex
+
+
+class Change(NamedTuple):
+    """Изменение записи таблицы."""
+
+    table: str
+    item_id: int | None
+    origin: str = ORIGIN
+
+    def to_payload(self) -> str:
+        return json.dumps(
+            {"table": self.table, "id": self.item_id, "origin": self.origin},
+        )
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "Change":
+        data = json.loads(payload)
+        return cls(data["table"], data["id"], data["origin"])
+
+
+# Обработчик изменений, `None` - изменения могли быть пропущены
+ChangeHandler = Callable[[Change | None], Awaitable[None]]
+
+
+async def notify_change(session: AsyncSession, table: str, item_id: int | None) -> None:
+    """Отправить уведомление об изменении в текущей транзакции."""
+    if not settings.CHANGE_NOTIFY_ENABLED:
+        return
+    payload = Change(table, item_id).to_payload()
+    await session.exec(select(func.pg_notify(settings.CHANGE_NOTIFY_CHANNEL, payload)))
+
+
+async def listen_changes(
+    handler: ChangeHandler,
+    ready: asyncio.Event | None = None,
+) -> None:
+    """Передавать в `handler` изменения, сделанные другими процессами.
+
+    При потере соединения выполняется переподключение, после которого
+    `handler` вызывается с `None`. `ready` устанавливается после первой
+    успешной подписки на канал.
+    """
+    reconnect = False
+    while True:
+        try:
+            connection = await psycopg.AsyncConnection.connect(
+                host=settings.POSTGRES_SERVER,
+                port=settings.POSTGRES_PORT,
+                user=settings.POSTGRES_USER,
+                password=settings.POSTGRES_PASSWORD,
+                dbname=settings.POSTGRES_DB,
+                autocommit=True,
+            )
+            async with connection:
+                channel = sql.Identifier(settings.CHANGE_NOTIFY_CHANNEL)
+                await connection.execute(sql.SQL("LISTEN {}").format(channel))
+                if reconnect:
+                    await handler(None)
+                if ready is not None:
+                    ready.set()
+
+                async for notify in connection.notifies():
+                    try:
+                        change = Change.from_payload(notify.payload)
+                    except (ValueError, KeyError, TypeError):
+                        logger.exception("Неверное уведомление %r", notify.payload)
+                        continue
+                    if change.origin != ORIGIN:
+                        await handler(change)
+        except (psycopg.Error, OSError):
+            logger.exception("Ошибка соединения для получения уведомлений")
+
+        reconnect = True
+        await asyncio.sleep(settings.CHANGE_NOTIFY_RECONNECT_DELAY)
@@ -0,0 +1,67 @@
+"""Модуль объединения одинаковых одновременных вычислений (single-flight)."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+_T = TypeVar("_T")
+
+
+class SingleFlight:
+    """Одновременные вызовы `do` с одним ключом выполняют `fn` один раз.
+
+    Первый вызов (ведущий) выполняет `fn`, остальные ждут его результат.
+    Если ведущий отменен, ожидающие повторяют вызов и один из них становится
+    ведущим. Результат разделяется между запросами, поэтому он должен быть
+    неизменяемым (например, строка HTML).
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future[Any]] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[_T]]) -> _T:
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                return await self._lead(key, fn)
+
+            self.shared += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not future.cancelled() or (task and task.cancelling()):
+                    raise
+
+    async def _lead(self, key: Hashable, fn: Callable[[], Awaitable[_T]]) -> _T:
+        future: asyncio.Future[_T] = asyncio.get_running_loop().create_future()
+        # NOTE: Ошибка считается полученной, даже если ожидающих не было
+        future.add_done_callback(lambda i: i.cancelled() or i.exception())
+        self._calls[key] = future
+        self.calls += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "shared": self.shared,
+        }
+
+
+# Общие HTML фрагменты одинаковых одновременных запросов
+render_flight = SingleFlight()
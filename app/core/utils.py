@@ -1,5 +1,6 @@
 """Модуль вспомогательных функций."""
 
+import hashlib
 from io import BytesIO
 from pathlib import Path
 
@@ -62,7 +63,15 @@ async def validate_image(file_: UploadFile) -> None:
         await validator(file_)
 
 
-def convert_to_list_int(string: str) -> list[int]:
-    if not string:
-        return []
-    return list(map(int, string.split(",")))
+def escape_like(value: str, escape: str = "\\") -> str:
+    """Экранировать спецсимволы шаблона LIKE."""
+    return (
+        value.replace(escape, escape * 2)
+        .replace("%", f"{escape}%")
+        .replace("_", f"{escape}_")
+    )
+
+
+def content_hash(data: bytes) -> str:
+    """Хеш содержимого для ETag и версионирования URL."""
+    return hashlib.sha256(data).hexdigest()[:32]
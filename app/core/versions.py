@@ -0,0 +1,44 @@
+"""Модуль счетчиков версий данных для условных GET запросов.
+
+Версии хранятся в памяти процесса и увеличиваются при каждом изменении
+таблицы или записи. В ETag входит токен процесса, поэтому ETag другого
+процесса или до перезапуска никогда не совпадет.
+"""
+
+import time
+import uuid
+from collections.abc import Hashable, Iterable
+
+
+class DataVersions:
+    """Версии данных по ключам: `(таблица,)` и `(таблица, ID)`."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Сбросить все версии (изменения могли быть пропущены)."""
+        self.token = uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self._versions: dict[Hashable, int] = {}
+        self._modified_at: dict[Hashable, float] = {}
+
+    def bump(self, *keys: Hashable) -> None:
+        now = time.time()
+        for key in keys:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._modified_at[key] = now
+
+    def etag(self, keys: Iterable[Hashable]) -> str:
+        versions = ".".join(str(self._versions.get(key, 0)) for key in keys)
+        return f'"{self.token}-{versions}"'
+
+    def modified_at(self, keys: Iterable[Hashable]) -> float:
+        """Время последнего изменения данных по ключам."""
+        return max(
+            (self._modified_at.get(key, self.started_at) for key in keys),
+            default=self.started_at,
+        )
+
+
+data_versions = DataVersions()
@@ -0,0 +1,67 @@
+"""Модуль замеров скорости скомпилированных шаблонов строк таблиц и FT.
+
+Строки синтетических записей отрисовываются обоими способами. Совпадение
+результатов проверяется в `tests/test_compiled.py`.
+
+Запуск: `python -m app.html_services.benchmark`
+"""
+
+import time
+from typing import Any
+
+from fasthtml.common import to_xml
+
+from app.html_services.cocktail import cocktail_row
+from app.html_services.compiled import CompiledRow
+from app.html_services.ingredient import ingredient_row
+from app.models import Cocktail, Ingredient
+from app.models.enums import IngredientType, TypeABV
+
+
+def _benchmark(name: str, render: CompiledRow, items: list[Any]) -> None:
+    render.verify = 0
+    start = time.perf_counter()
+    for item in items:
+        to_xml(render.render(item))
+    ft_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for item in items:
+        render(item)
+    compiled_time = time.perf_counter() - start
+
+    print(
+        f"{name} x{len(items)}: FT {ft_time:.3f}s, "
+        f"compiled {compiled_time:.3f}s ({ft_time / compiled_time:.1f}x)",
+    )
+
+
+def main() -> None:
+    """Точка входа."""
+    for count in (1_000, 10_000):
+        cocktails = [
+            Cocktail(
+                id=i,
+                name=f"Коктейль <{i}> & 'co'",
+                description=None if i % 3 else f'Описание "{i}"',
+            )
+            for i in range(1, count + 1)
+        ]
+        _benchmark("cocktail", cocktail_row, cocktails)
+
+        abv, types = list(TypeABV), list(IngredientType)
+        ingredients = [
+            Ingredient(
+                id=i,
+                name=f"Ингредиент {i} <b>",
+                description=None if i % 2 else f"Описание & {i}",
+                abv=None if i % 5 == 0 else abv[i % len(abv)],
+                type_=types[i % len(types)],
+            )
+            for i in range(1, count + 1)
+        ]
+        _benchmark("ingredient", ingredient_row, ingredients)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 """Модуль HTML сервиса для работы с коктейлями."""
 
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
+from itertools import groupby
+from operator import itemgetter
 
 from fasthtml.common import (
     FT,
@@ -36,6 +38,8 @@ from fasthtml.common import (
 )
 
 from app.api.const import CARD_ICON_32, PENCIL_ICON_32, PLUS_ICON_32, TRACH_ICON_32
+from app.html_services.compiled import CompiledRow
+from app.html_services.utils import cached_rows, next_page_row
 from app.models import Cocktail, Ingredient
 
 
@@ -75,12 +79,60 @@ class CocktailHTMLService:
             **kwargs,
         )
 
+    @classmethod
+    def rows_view(cls, cocktails: Iterable[Cocktail]) -> NotStr:
+        return cached_rows(
+            cocktails,
+            key=lambda i: (Cocktail.__tablename__, i.id, i.version),
+            render=cocktail_row,
+        )
+
+    @classmethod
+    def missing_row(cls, missing: int) -> FT:
+        """Заголовок группы коктейлей с одинаковым числом недостающих ингредиентов."""
+        if missing:
+            label = f"Не хватает ингредиентов: {missing}"
+        else:
+            label = "Все ингредиенты есть"
+        # NOTE: Строка, т.к. атрибут со значением 0 не выводится
+        return Tr(Th(label, colspan=5), data_missing=str(missing))
+
+    @classmethod
+    def ranked_rows_view(
+        cls,
+        ranked: Iterable[tuple[Cocktail, int]],
+        after_missing: int | None = None,
+    ) -> list[FT | NotStr]:
+        """Строки коктейлей, сгруппированные по числу недостающих ингредиентов.
+
+        Группа, продолжающаяся с предыдущей страницы (`after_missing`), выводится
+        без заголовка.
+        """
+        rows: list[FT | NotStr] = []
+        for missing, group in groupby(ranked, key=itemgetter(1)):
+            if missing != after_missing:
+                rows.append(cls.missing_row(missing))
+            rows.append(cls.rows_view(cocktail for cocktail, _ in group))
+        return rows
+
+    @classmethod
+    def next_page_view(cls, **kwargs) -> FT:
+        return next_page_row(colspan=5, **kwargs)
+
     @classmethod
     def all_view(
         cls,
         cocktails: Sequence[Cocktail],
         ingredients: Sequence[Ingredient] | None = None,
+        next_page: FT | NotStr | None = None,
+        *,
+        search_on_load: bool = True,
     ) -> FT:
+        # NOTE: Поиск при загрузке заменяет таблицу первой страницей, поэтому
+        # отключается, если таблица передается целиком
+        trigger = "input changed delay:500ms, keyup[key=='Enter']"
+        if search_on_load:
+            trigger += ", load"
         search = Search(
             Input(
                 placeholder="Введите название",
@@ -88,7 +140,7 @@ class CocktailHTMLService:
                 type="search",
                 cls="form-control",
                 hx_post="/cocktails/search",
-                hx_trigger="input changed delay:500ms, keyup[key=='Enter'], load",
+                hx_trigger=trigger,
                 hx_target="#cocktail-list",
             ),
         )
@@ -131,7 +183,9 @@ class CocktailHTMLService:
             Class="add",
         )
 
-        rows = [cls.row_view(i) for i in cocktails]
+        rows: list[FT | NotStr] = [cls.rows_view(cocktails)]
+        if next_page is not None:
+            rows.append(next_page)
         head = Thead(
             *map(Th, (P("Название"), P("Описание"), P(""), P(""), add_button)),
             cls="bg-purple/10",
@@ -173,65 +227,57 @@ class CocktailHTMLService:
     def get_ingredients_list(
         cls,
         components: list[tuple[Ingredient, int]],
-        cocktail_id: int | None,
-        form_id: str,
+        draft: str,
+        **kwargs,
     ) -> list[FT]:
-        params = f"cocktail-id={cocktail_id}" if cocktail_id else ""
         return [
             Li(
                 f"{ingredient.name} {quantity} {ingredient.unit_measurement}",
                 Button(
                     "Удалить",
-                    hx_target=f"#{form_id}",
-                    hx_include="[name='ingredient'],[name='quantity'],[name='name'],[name='description']",
-                    hx_get=f"/cocktails/add/form/?{params}&deleted-id={ingredient.id}",
+                    hx_delete=f"/cocktails/drafts/{draft}/components/{ingredient.id}",
+                    hx_target="closest li",
+                    hx_swap="outerHTML",
                     style="width: 150px",
                     Class="delete",
                 ),
-                Hidden(value=ingredient.id, id=f"ingredient-id-{ingredient.id}"),
-                Hidden(value=quantity, id=f"quantity-{ingredient.id}"),
-                id=f"component-{ingredient.id}",
+                id=f"component-{draft}-{ingredient.id}",
+                **kwargs,
             )
             for (ingredient, quantity) in components
         ]
 
+    @classmethod
+    def components_label(cls, draft: str, *, is_empty: bool, **kwargs) -> FT:
+        return P(
+            "Ингредиенты отсутствуют" if is_empty else "Ингредиенты:",
+            id=f"components-label-{draft}",
+            **kwargs,
+        )
+
     @classmethod
     def edit_form(
         cls,
         ingredients: Sequence[Ingredient],
         components: list[tuple[Ingredient, int]],
+        draft: str,
         item_id: int | None = None,
-        *,
-        is_start_form: bool = False,
     ) -> FT:
         if item_id:
             hx_patch = f"/cocktails/{item_id}"
             hx_post = None
             data_target_suffix = "edit"
             form_id = "edit-form"
-            params = f"?cocktail-id={item_id}"
         else:
             hx_patch = None
             hx_post = "/cocktails"
             data_target_suffix = "add"
             form_id = "add-form"
-            params = ""
-
-        components_li = cls.get_ingredients_list(components, item_id, form_id)
-        label = "Ингредиенты:" if components_li else "Ингредиенты отсутствуют"
 
         select_options = [
             Option(ingredient.name, id=ingredient.id) for ingredient in ingredients
         ]
 
-        hx_vals = None
-
-        if not is_start_form:
-            hx_vals = {
-                "ingredients": ",".join(str(i.id) for i, _ in components),
-                "quantities": ",".join(str(i) for _, i in components),
-            }
-
         form = Form(
             Label("Название", Input(id="name")),
             Label(
@@ -241,6 +287,7 @@ class CocktailHTMLService:
                     id="description",
                 ),
             ),
+            Hidden(value=draft, name="draft"),
             Grid(
                 Select(
                     *select_options,
@@ -255,16 +302,25 @@ class CocktailHTMLService:
                 ),
                 Button(
                     "Добавить",
-                    hx_get=f"/cocktails/add/form{params}",
-                    hx_include="[name='ingredient'],[name='quantity'],[name='name'],[name='description']",
+                    hx_post=f"/cocktails/drafts/{draft}/components",
+                    hx_include=(
+                        f"#{form_id} [name='ingredient'],#{form_id} [name='quantity']"
+                    ),
+                    hx_target=f"#components-{draft}",
+                    hx_swap="beforeend",
                     style="width: 150px",
-                    target_id=form_id,
                     Class="add",
                 ),
                 style="grid-template-columns: 3fr 1fr 1fr",
             ),
             Div(
-                Div(P(label), Ul(*components_li)),
+                Div(
+                    cls.components_label(draft, is_empty=not components),
+                    Ul(
+                        *cls.get_ingredients_list(components, draft),
+                        id=f"components-{draft}",
+                    ),
+                ),
             ),
             Button(
                 "Сохранить",
@@ -278,17 +334,15 @@ class CocktailHTMLService:
                 Class="add",
             ),
             Script(
-                code="""
-                    new YoSelect(document.querySelector('#ingredient'), {
+                code=f"""
+                    new YoSelect(document.querySelector('#{form_id} #ingredient'), {{
                         search: true,
                         searchPlaceholder: 'Найти ингридиент...',
                         noResultsPlaceholder: 'Ингридиентов не найдено',
-                    });
+                    }});
                 """,
             ),
             id=form_id,
-            hx_vals=hx_vals,
-            hx_on__before_swap="this.replaceChildren();",
         )
         return form
 
@@ -330,9 +384,9 @@ class CocktailHTMLService:
         return content
 
     @classmethod
-    def create_view(cls, ingredients: Sequence[Ingredient]) -> FT:
+    def create_view(cls, ingredients: Sequence[Ingredient], draft: str) -> FT:
         return Card(
-            cls.edit_form(ingredients, [], is_start_form=True),
+            cls.edit_form(ingredients, [], draft),
             header=Div(
                 Button(
                     aria_label="Close",
@@ -357,16 +411,19 @@ class CocktailHTMLService:
         )
 
     @classmethod
-    def update_view(cls, cocktail: Cocktail, ingredients: Sequence[Ingredient]) -> FT:
+    def update_view(
+        cls,
+        cocktail: Cocktail,
+        ingredients: Sequence[Ingredient],
+        draft: str,
+    ) -> FT:
+        # NOTE: Список содержит все ингредиенты, т.к. состав черновика меняется
+        # без перерисовки формы, а повторное добавление заменяет количество
         form = cls.edit_form(
-            ingredients=[
-                i
-                for i in ingredients
-                if i.id not in set(i.ingredient.id for i in cocktail.components)
-            ],
+            ingredients=ingredients,
             components=[(i.ingredient, i.quantity) for i in cocktail.components],
+            draft=draft,
             item_id=cocktail.id,
-            is_start_form=False,
         )
 
         return Card(
@@ -397,3 +454,7 @@ class CocktailHTMLService:
     @classmethod
     def delete_view(cls, item_id: int) -> FT:
         return clear(f"cocktail-{item_id}")
+
+
+# HTML строки таблицы без дополнительных атрибутов
+cocktail_row = CompiledRow(CocktailHTMLService.row_view)
@@ -0,0 +1,134 @@
+"""Модуль скомпилированных шаблонов повторяющихся HTML фрагментов.
+
+Фрагмент один раз отрисовывается через FT с метками вместо значений полей
+записи, HTML разбивается по меткам на статические части. Отрисовка записи -
+склейка статических частей с экранированными значениями полей, без
+построения дерева FT и `to_xml`.
+
+Сравнение с FT: `python -m app.html_services.benchmark`
+"""
+
+import logging
+import re
+from collections.abc import Callable
+from html import escape
+from typing import Any, Generic, TypeVar
+
+from fasthtml.common import FT, to_xml
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Метка поля записи (символы из области для частного использования Unicode)
+_MARK = "\ue000{}\ue001"
+_SLOT = re.compile(_MARK.format("(\\d+)"))
+
+
+class _Probe:
+    """Заглушка записи: вместо значений полей возвращает метки."""
+
+    def __init__(self) -> None:
+        self.fields: dict[str, int] = {}
+
+    def __getattr__(self, name: str) -> str:
+        index = self.fields.setdefault(name, len(self.fields))
+        return _MARK.format(index)
+
+
+class _Unsupported(Exception):
+    """Значение поля нельзя подставить в шаблон, запись отрисовывается FT."""
+
+
+def _text(value: Any) -> str:
+    """Значение как текст элемента, как в `to_xml`."""
+    if value is None:
+        return ""
+    if hasattr(value, "__html__"):
+        return value.__html__()
+    return escape(value) if isinstance(value, str) else str(value)
+
+
+def _text_part(value: Any) -> str:
+    """Значение как часть текста элемента (значение подставлено в f-строку)."""
+    return escape(format(value))
+
+
+def _attr(value: Any) -> str:
+    """Значение как часть атрибута.
+
+    `to_xml` выбирает кавычки атрибута по его значению и пропускает атрибуты
+    со значениями `0`, `False` и `""`. Поэтому подставляются только целые
+    числа, кроме 0, остальные значения вызывают `_Unsupported`.
+    """
+    if type(value) is not int or value == 0:
+        raise _Unsupported
+    return str(value)
+
+
+class CompiledRow(Generic[_T]):
+    """Скомпилированный шаблон `render` - функции отрисовки записи.
+
+    Первые `verify` результатов сравниваются с отрисовкой через FT. При
+    расхождении или ошибке компиляции шаблон отключается и используется FT.
+    """
+
+    def __init__(self, render: Callable[[_T], FT], verify: int = 100) -> None:
+        self.render = render
+        self.verify = verify
+        self._fields: list[str] = []
+        self._parts: list[str | tuple[int, Callable[[Any], str]]] | None = None
+        self._compiled = False
+
+    def _compile(self) -> None:
+        self._compiled = True
+        probe = _Probe()
+        try:
+            html = to_xml(self.render(probe))  # type: ignore[arg-type]
+        except Exception:
+            logger.exception("Не удалось скомпилировать шаблон %r", self.render)
+            return
+
+        parts: list[str | tuple[int, Callable[[Any], str]]] = []
+        position = 0
+        for match in _SLOT.finditer(html):
+            # Метка внутри открывающего тега - часть значения атрибута, иначе
+            # текст элемента целиком или его часть
+            prefix = html[: match.start()]
+            if prefix.rfind("<") > prefix.rfind(">"):
+                fmt = _attr
+            elif prefix.endswith(">") and html.startswith("<", match.end()):
+                fmt = _text
+            else:
+                fmt = _text_part
+            parts.append(html[position : match.start()])
+            parts.append((int(match.group(1)), fmt))
+            position = match.end()
+        parts.append(html[position:])
+
+        self._fields = list(probe.fields)
+        self._parts = [i for i in parts if i != ""]
+
+    def __call__(self, item: _T) -> str:
+        if not self._compiled:
+            self._compile()
+        if self._parts is None:
+            return to_xml(self.render(item))
+
+        values = [getattr(item, field) for field in self._fields]
+        try:
+            html = "".join(
+                part if isinstance(part, str) else part[1](values[part[0]])
+                for part in self._parts
+            )
+        except _Unsupported:
+            return to_xml(self.render(item))
+
+        if self.verify > 0:
+            self.verify -= 1
+            expected = to_xml(self.render(item))
+            if html != expected:
+                logger.warning("Шаблон %r не совпадает с FT, отключен", self.render)
+                self._parts = None
+                return expected
+        return html
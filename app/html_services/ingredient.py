@@ -1,6 +1,6 @@
 """Модуль HTML сервиса для работы с ингредиентами."""
 
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
 
 from fasthtml.common import (
     FT,
@@ -14,6 +14,7 @@ from fasthtml.common import (
     Input,
     Label,
     Main,
+    NotStr,
     Option,
     P,
     Script,
@@ -30,6 +31,8 @@ from fasthtml.common import (
 )
 
 from app.api.const import CARD_ICON_32, PENCIL_ICON_32, PLUS_ICON_32, TRACH_ICON_32
+from app.html_services.compiled import CompiledRow
+from app.html_services.utils import cached_rows, next_page_row
 from app.models import Ingredient
 from app.models.enums import IngredientType, TypeABV, UnitMeasurement
 
@@ -71,7 +74,21 @@ class IngredientHTMLService:
             **kwargs,
         )
 
-    def all_view(self, ingredients: Sequence[Ingredient]) -> FT:
+    def rows_view(self, ingredients: Iterable[Ingredient]) -> NotStr:
+        return cached_rows(
+            ingredients,
+            key=lambda i: (Ingredient.__tablename__, i.id, i.version),
+            render=ingredient_row,
+        )
+
+    def next_page_view(self, **kwargs) -> FT:
+        return next_page_row(colspan=7, **kwargs)
+
+    def all_view(
+        self,
+        ingredients: Sequence[Ingredient],
+        next_page: FT | NotStr | None = None,
+    ) -> FT:
         add_button = Button(
             PLUS_ICON_32,
             data_target="ingredient-modal-add",
@@ -81,7 +98,9 @@ class IngredientHTMLService:
             Class="add",
         )
 
-        rows = [self.row_view(i) for i in ingredients]
+        rows: list[FT | NotStr] = [self.rows_view(ingredients)]
+        if next_page is not None:
+            rows.append(next_page)
         head = Thead(
             *map(
                 Th,
@@ -288,3 +307,7 @@ class IngredientHTMLService:
 
     def delete_view(self, item_id: int) -> FT:
         return clear(f"ingredient-{item_id}")
+
+
+# HTML строки таблицы без дополнительных атрибутов
+ingredient_row = CompiledRow(IngredientHTMLService().row_view)
@@ -0,0 +1,57 @@
+"""Модуль общих HTML элементов."""
+
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Hashable, Iterable
+from typing import TypeVar
+
+from fasthtml.common import FT, NotStr, Td, Tr, to_xml
+
+from app.core.cache import MISSING, LRUCache
+from app.core.config import settings
+
+_T = TypeVar("_T")
+
+# (таблица, ID, версия записи) -> HTML строки таблицы
+row_cache = LRUCache(max_size=settings.ROW_CACHE_SIZE)
+
+# Место строк таблицы в странице потокового ответа, см. `stream_table`
+ROWS_PLACEHOLDER = NotStr("<!-- rows -->")
+
+
+def next_page_row(colspan: int, **kwargs) -> FT:
+    """Строка таблицы, загружающая следующую страницу при появлении на экране."""
+    return Tr(
+        Td(aria_busy="true", colspan=colspan),
+        hx_trigger="revealed",
+        hx_swap="outerHTML",
+        hx_target="this",
+        **kwargs,
+    )
+
+
+def cached_rows(
+    items: Iterable[_T],
+    key: Callable[[_T], Hashable],
+    render: Callable[[_T], str],
+) -> NotStr:
+    """HTML строк таблицы, строки неизменившихся записей берутся из кеша.
+
+    Ключ должен включать версию записи, поэтому инвалидация не нужна.
+    """
+    rows = []
+    for item in items:
+        item_key = key(item)
+        html = row_cache.get(item_key)
+        if html is MISSING:
+            html = render(item)
+            row_cache.set(item_key, html)
+        rows.append(html)
+    return NotStr("".join(rows))
+
+
+async def stream_table(page: FT, rows: AsyncIterable[NotStr]) -> AsyncIterator[str]:
+    """HTML страницы по частям: до `ROWS_PLACEHOLDER`, строки таблицы, остаток."""
+    head, tail = to_xml(page).split(str(ROWS_PLACEHOLDER), 1)
+    yield head
+    async for chunk in rows:
+        yield chunk
+    yield tail
@@ -1,33 +1,71 @@
+import asyncio
+import contextlib
+import logging
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.api.compression import CompressionMiddleware
 from app.api.main import app_router
 from app.core.config import settings
-from app.core.db import engine
-from app.core.init_db import init_db
+from app.core.db import async_engine, engine
+from app.core.init_db import prepare_db
+from app.core.notify import listen_changes
+from app.services import CocktailService
+from app.services.changes import apply_change
+from app.services.explain import log_hot_queries
+
+logger = logging.getLogger(__name__)
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
+async def _resync_after(listening: asyncio.Event) -> None:
+    """Сбросить кеши и перестроить индекс после запоздавшей подписки."""
+    await listening.wait()
+    await apply_change(None)
+
+
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
     """Дополнительная логика запуска и завершения работы."""
-    from app.models import Base
-
-    Base.metadata.create_all(engine)
-
-    with Session(engine) as session:
-        init_db(session)
+    prepare_db(engine)
+
+    if settings.EXPLAIN_ON_STARTUP:
+        await log_hot_queries()
+
+    # NOTE: Индекс строится после подписки на уведомления, иначе изменения
+    # других процессов между чтением данных и подпиской будут пропущены
+    tasks = []
+    if settings.CHANGE_NOTIFY_ENABLED:
+        listening = asyncio.Event()
+        tasks.append(asyncio.create_task(listen_changes(apply_change, listening)))
+        try:
+            await asyncio.wait_for(
+                listening.wait(),
+                settings.CHANGE_NOTIFY_STARTUP_TIMEOUT,
+            )
+        except TimeoutError:
+            logger.warning("Нет подписки на уведомления об изменениях")
+            tasks.append(asyncio.create_task(_resync_after(listening)))
+
+    if settings.COCKTAIL_INDEX_ENABLED:
+        async with AsyncSession(async_engine) as session:
+            await CocktailService(session).build_index()
 
     yield
 
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
 
 def get_application() -> FastAPI:
     """Создать приложение FastAPI."""
@@ -37,6 +75,14 @@ def get_application() -> FastAPI:
         lifespan=lifespan,
     )
     app_.include_router(app_router)
+    if settings.COMPRESSION_ENABLED:
+        app_.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+            zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+        )
 
     return app_
 
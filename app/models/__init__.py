@@ -1,11 +1,14 @@
-from app.models.base import Base
+from app.models.base import Base, Versioned
 from app.models.cocktail import Cocktail
 from app.models.component import Component
+from app.models.db_state import DbState
 from app.models.ingredient import Ingredient
 
 __all__ = (
     "Base",
     "Cocktail",
     "Component",
+    "DbState",
     "Ingredient",
+    "Versioned",
 )
@@ -24,3 +24,13 @@ class Base(SQLModel):
     def __tablename__(cls) -> str:  # type: ignore[override]
         """Имя таблицы в формате snake_case."""
         return inflection.underscore(cls.__name__)
+
+
+class Versioned(SQLModel):
+    """Модель с версией записи, увеличивающейся при каждом изменении."""
+
+    version: int = Field(
+        default=1,
+        sa_column_kwargs={"server_default": "1"},
+        description="Версия записи",
+    )
@@ -4,7 +4,7 @@ import sqlalchemy as sa
 from pydantic import computed_field, field_validator, model_validator
 from sqlmodel import Field, Relationship
 
-from app.models.base import Base
+from app.models.base import Base, Versioned
 
 if TYPE_CHECKING:
     from app.models.component import Component
@@ -29,10 +29,34 @@ class CocktailBase(Base):
     )
 
 
-class Cocktail(CocktailBase, table=True):
+class Cocktail(CocktailBase, Versioned, table=True):
+    __table_args__ = (
+        sa.Index("ix_cocktail_name", "name"),
+        # NOTE: Триграммные индексы для поиска `ILIKE '%...%'`
+        sa.Index(
+            "ix_cocktail_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        sa.Index(
+            "ix_cocktail_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+    )
+
     components: list["Component"] = Relationship(back_populates="cocktail")
 
 
+sa.event.listen(
+    Base.metadata,
+    "before_create",
+    sa.DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
+
+
 class CocktailCreate(CocktailBase):
     ingredients: list[int]
     quantities: list[int]
@@ -50,6 +74,8 @@ class CocktailCreate(CocktailBase):
         # NOTE: FastAPI сам преобразует значение в список из 1 строки
         if len(value) == 1 and isinstance(value[0], str):
             return [int(i) for i in value[0].split(",")]
+        if all(isinstance(i, int) for i in value):
+            return list(value)  # type: ignore[arg-type]
         msg = "Неверный формат передачи компонент"
         raise ValueError(msg)
 
@@ -1,3 +1,4 @@
+import sqlalchemy as sa
 from sqlmodel import Field, Relationship
 
 from app.models.base import Base
@@ -20,6 +21,16 @@ class ComponentBase(Base):
 
 
 class Component(ComponentBase, table=True):
+    __table_args__ = (
+        sa.UniqueConstraint(
+            "cocktail_id",
+            "ingredient_id",
+            name="uq_component_cocktail_ingredient",
+        ),
+        # NOTE: Покрывающий индекс для фильтрации коктейлей по ингредиентам
+        sa.Index("ix_component_ingredient_cocktail", "ingredient_id", "cocktail_id"),
+    )
+
     ingredient: Ingredient = Relationship()
     cocktail: Cocktail = Relationship()
 
@@ -0,0 +1,16 @@
+from sqlmodel import Field
+
+from app.models.base import Base
+
+
+class DbState(Base, table=True):
+    """Служебные сведения о состоянии базы данных."""
+
+    key: str = Field(
+        unique=True,
+        max_length=64,
+        description="Ключ",
+    )
+    value: str = Field(
+        description="Значение",
+    )
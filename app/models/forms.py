@@ -1,14 +1,52 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 
 
 class SearchForm(BaseModel):
     search: str | None
+    after_rank: int | None = None
+    after_id: int | None = None
+
+    @property
+    def after(self) -> tuple[int, int] | None:
+        if self.after_rank is None or self.after_id is None:
+            return None
+        return self.after_rank, self.after_id
 
 
 class FiltersFrom(BaseModel):
     filters: list[int] | None = None
+    after_id: int | None = None
 
     @field_validator("filters", mode="before")
     @classmethod
     def _convert_list(cls, value: list[str] | list[int]) -> list[int]:
         return [int(i) for i in value]
+
+
+class InventoryForm(BaseModel):
+    ingredients: list[int] | None = None
+    max_missing: int = Field(default=2, ge=0)
+    after_missing: int | None = None
+    after_id: int | None = None
+
+    @property
+    def after(self) -> tuple[int, int] | None:
+        if self.after_missing is None or self.after_id is None:
+            return None
+        return self.after_missing, self.after_id
+
+    @field_validator("ingredients", mode="before")
+    @classmethod
+    def _convert_list(cls, value: list[str] | list[int]) -> list[int]:
+        return [int(i) for i in value]
+
+
+class ComponentForm(BaseModel):
+    ingredient: str
+    quantity: int = Field(gt=0)
+
+
+class CocktailDraftForm(BaseModel):
+    name: str
+    description: str | None = None
+    draft: str
@@ -1,7 +1,7 @@
 import sqlalchemy as sa
 from sqlmodel import Field, SQLModel
 
-from app.models.base import Base
+from app.models.base import Base, Versioned
 from app.models.enums import IngredientType, TypeABV, UnitMeasurement
 
 
@@ -37,8 +37,8 @@ class IngredientBase(Base):
     )
 
 
-class Ingredient(IngredientBase, table=True):
-    pass
+class Ingredient(IngredientBase, Versioned, table=True):
+    __table_args__ = (sa.UniqueConstraint("name", name="uq_ingredient_name"),)
 
 
 class IngredientCreate(IngredientBase):
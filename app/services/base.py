@@ -1,49 +1,238 @@
-from collections.abc import Sequence
-from typing import Generic, TypeVar
+from collections.abc import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterable,
+    Sequence,
+)
+from enum import StrEnum
+from typing import Any, Generic, TypeVar
 
-from sqlmodel import Session, SQLModel, col, delete, select
+from sqlalchemy import LargeBinary
+from sqlalchemy.orm import defer
+from sqlalchemy.orm.interfaces import ORMOption
+from sqlmodel import SQLModel, col, delete, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
 
-from app.models.base import Base
+from app.core.cache import MISSING, Cache, query_cache
+from app.core.config import settings
+from app.core.notify import notify_change
+from app.core.versions import data_versions
+from app.models.base import Base, Versioned
 
 _ModelType = TypeVar("_ModelType", bound=Base)
 _CreateModelType = TypeVar("_CreateModelType", bound=SQLModel)
 _UpdateModelType = TypeVar("_UpdateModelType", bound=SQLModel)
+_T = TypeVar("_T")
+
+
+class LoadStrategy(StrEnum):
+    """Стратегия загрузки связанных объектов."""
+
+    # Связанные объекты не загружаются, обращение к ним вызывает ошибку
+    NONE = "none"
+    # Отдельный запрос `IN (...)` на каждый уровень связей
+    SELECTIN = "selectin"
+    # Один запрос с `LEFT OUTER JOIN`
+    JOINED = "joined"
 
 
 class BaseService(Generic[_ModelType, _CreateModelType, _UpdateModelType]):
-    def __init__(self, model: type[_ModelType], session: Session) -> None:
+    def __init__(
+        self,
+        model: type[_ModelType],
+        session: AsyncSession,
+        cache: Cache | None = None,
+    ) -> None:
         self.model = model
         self.session = session
+        self.cache = query_cache if cache is None else cache
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__  # type: ignore[return-value]
+
+    def _load_options(self, strategy: LoadStrategy) -> list[ORMOption]:
+        """Опции загрузки модели и связанных объектов.
+
+        Бинарные колонки (иконки) не загружаются, они отдаются отдельным
+        запросом через `get_icon`.
+        """
+        return [
+            defer(getattr(self.model, column.key), raiseload=True)
+            for column in self.model.__table__.columns  # type: ignore[attr-defined]
+            if isinstance(column.type, LargeBinary)
+        ]
+
+    def _dependency_tags(self, load: LoadStrategy) -> tuple[Hashable, ...]:
+        """Теги кеша таблиц связанных объектов, загружаемых с записью."""
+        return ()
+
+    async def _cached(
+        self,
+        key: tuple[Hashable, ...],
+        tags: Iterable[Hashable],
+        fetch: Callable[[], Awaitable[_T]],
+    ) -> _T:
+        """Результат запроса из кеша или из БД с сохранением в кеш."""
+        cache_key = (self.table, *key)
+        value = self.cache.get(cache_key)
+        if value is MISSING:
+            epoch = self.cache.epoch
+            value = await fetch()
+            self._detach(value)
+            self.cache.set(cache_key, value, tags, epoch)
+        return value
+
+    def _detach(self, value: Any) -> None:
+        """Отсоединить объекты от сессии, чтобы их можно было разделять между
+        запросами."""
+        items = value if isinstance(value, list | tuple) else (value,)
+        for item in items:
+            obj = item[0] if isinstance(item, tuple) else item
+            if isinstance(obj, Base) and obj in self.session:
+                self.session.expunge(obj)
+
+    async def _commit(self, item_id: int | None) -> None:
+        """Зафиксировать изменение записи с уведомлением других процессов."""
+        await notify_change(self.session, self.table, item_id)
+        await self.session.commit()
 
-    def get(self, item_id: int) -> _ModelType | None:
-        return self.session.get(self.model, item_id)
+    async def _bump_version(self, item: _ModelType) -> None:
+        """Увеличить версию записи запросом к БД.
 
-    def get_all(self) -> Sequence[_ModelType]:
-        query = select(self.model)
-        return self.session.exec(query).all()
+        Одновременные изменения ждут блокировки строки и получают разные
+        версии, в отличие от увеличения версии загруженного объекта.
+        """
+        version = col(self.model.version)  # type: ignore[attr-defined]
+        query = (
+            update(self.model)
+            .where(col(self.model.id) == item.id)
+            .values(version=version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.exec(query)  # type: ignore[call-overload]
+        await self.session.refresh(item, ["version"])
 
-    def create(self, data: _CreateModelType) -> _ModelType:
-        if isinstance(data, dict):
-            data = self.model.model_validate(data)
-        self.session.add(data)
-        self.session.commit()
-        self.session.refresh(data)
+    def _changed(self, item_id: int | None) -> None:
+        """Сбросить записи кеша, зависящие от измененной записи."""
+        self.cache.invalidate((self.table,), (self.table, item_id))
+        data_versions.bump((self.table,), (self.table, item_id))
+
+    async def get(
+        self,
+        item_id: int,
+        load: LoadStrategy = LoadStrategy.NONE,
+    ) -> _ModelType | None:
+        return await self._cached(
+            ("get", item_id, load),
+            ((self.table, item_id), *self._dependency_tags(load)),
+            lambda: self._get(item_id, load),
+        )
+
+    async def _get(
+        self,
+        item_id: int,
+        load: LoadStrategy = LoadStrategy.NONE,
+    ) -> _ModelType | None:
+        return await self.session.get(
+            self.model,
+            item_id,
+            options=self._load_options(load),
+        )
+
+    async def get_all(
+        self,
+        load: LoadStrategy = LoadStrategy.NONE,
+    ) -> Sequence[_ModelType]:
+        query = select(self.model).options(*self._load_options(load))
+        return await self._cached(
+            ("all", load),
+            ((self.table,), *self._dependency_tags(load)),
+            lambda: self._fetch_all(query),
+        )
+
+    async def get_page(
+        self,
+        after_id: int | None = None,
+        limit: int | None = None,
+        load: LoadStrategy = LoadStrategy.NONE,
+    ) -> Sequence[_ModelType]:
+        """Страница записей с ID больше `after_id` (keyset пагинация)."""
+        query = (
+            select(self.model)
+            .order_by(col(self.model.id))
+            .limit(limit or settings.PAGE_SIZE)
+            .options(*self._load_options(load))
+        )
+        if after_id is not None:
+            query = query.where(col(self.model.id) > after_id)
+        return await self._cached(
+            ("page", after_id, limit, load),
+            ((self.table,), *self._dependency_tags(load)),
+            lambda: self._fetch_all(query),
+        )
+
+    async def stream_all(
+        self,
+        batch_size: int | None = None,
+        load: LoadStrategy = LoadStrategy.NONE,
+    ) -> AsyncIterator[Sequence[_ModelType]]:
+        """Все записи по порядку ID пачками из серверного курсора.
+
+        Результат не кешируется, в памяти находится только текущая пачка.
+        """
+        query = (
+            select(self.model)
+            .order_by(col(self.model.id))
+            .options(*self._load_options(load))
+            .execution_options(yield_per=batch_size or settings.PAGE_SIZE)
+        )
+        result = await self.session.stream_scalars(query)
+        async for batch in result.partitions():
+            yield batch
+
+    async def _fetch_all(self, query: SelectOfScalar[_ModelType]) -> list[_ModelType]:
+        return list((await self.session.exec(query)).unique().all())
+
+    async def get_icon(self, item_id: int) -> bytes | None:
+        """Иконка записи (для моделей с колонкой `icon`)."""
+        icon = col(self.model.icon)  # type: ignore[attr-defined]
+        query = select(icon).where(col(self.model.id) == item_id)
+        return (await self.session.exec(query)).first()
+
+    async def create(self, data: _CreateModelType) -> _ModelType:
+        if isinstance(data, self.model):
+            item = data
+        else:
+            item = self.model.model_validate(data)
+        self.session.add(item)
+        await self.session.flush()
+        await self._commit(item.id)
+        await self.session.refresh(item)
+        self._changed(item.id)
         # NOTE: Для преобразования типа
-        return self.model.model_validate(data)
+        return self.model.model_validate(item)
 
-    def update(self, item_id: int, data: _UpdateModelType) -> _ModelType:
-        item = self.get(item_id)
+    async def update(self, item_id: int, data: _UpdateModelType) -> _ModelType:
+        item = await self._get(item_id)
         if item is None:
             msg = "Доделать"
             raise ValueError(msg)
 
         item.sqlmodel_update(data.model_dump(exclude_unset=True))
         self.session.add(item)
-        self.session.commit()
-        self.session.refresh(item)
+        if isinstance(item, Versioned):
+            await self._bump_version(item)
+        await self._commit(item_id)
+        await self.session.refresh(item)
+        self._changed(item_id)
         return item
 
-    def delete(self, item_id: int) -> None:
+    async def delete(self, item_id: int) -> None:
         query = delete(self.model).where(col(self.model.id) == item_id)
-        self.session.exec(query)  # type: ignore[call-overload]
-        self.session.commit()
+        await self.session.exec(query)  # type: ignore[call-overload]
+        await self._commit(item_id)
+        self._changed(item_id)
@@ -0,0 +1,195 @@
+"""Модуль замеров скорости запросов сервисов на синтетических данных.
+
+Таблицы создаются в отдельной схеме внутри транзакции, которая в конце
+откатывается, поэтому данные БД не изменяются.
+
+Запуск: `python -m app.services.benchmark {search,index} [число коктейлей ...]`
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from functools import partial
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.db import async_engine
+from app.models import Base, Ingredient
+from app.models.forms import FiltersFrom, InventoryForm
+from app.services.cocktail import CocktailService
+from app.services.index import CocktailIngredientIndex
+from app.services.search import SearchResultCache
+
+BENCHMARK_SCHEMA = "benchmark"
+REPEAT = 5
+
+NAMES = (
+    "Мохито",
+    "Негрони",
+    "Дайкири",
+    "Маргарита",
+    "Космополитен",
+    "Пина колада",
+    "Манхэттен",
+    "Олд фэшн",
+)
+# Частая подстрока, редкая подстрока, подстрока описания, нет совпадений
+SEARCH_QUERIES = ("мох", "негрони 12", "a1b2", "нет такого")
+
+# Коктейль `i` содержит от 3 до 6 ингредиентов с ID `1 + (i + 37 * j) % 200`
+INGREDIENT_COUNT = 200
+INDEX_QUERIES: dict[str, Callable[[CocktailService], Awaitable[Sequence[Any]]]] = {
+    "filter_all": lambda s: s.filter_all(FiltersFrom(filters=[1, 38])),
+    "filter_all page": lambda s: s.filter_all(FiltersFrom(filters=[1]), limit=20),
+    "rank_by_inventory": lambda s: s.rank_by_inventory(
+        InventoryForm(ingredients=list(range(1, 41)), max_missing=1),
+    ),
+}
+
+
+async def _prepare(connection: AsyncConnection) -> None:
+    """Создать таблицы в схеме замеров."""
+    await connection.exec_driver_sql(f"CREATE SCHEMA {BENCHMARK_SCHEMA}")
+    await connection.exec_driver_sql(
+        f"SET LOCAL search_path = {BENCHMARK_SCHEMA}, public",
+    )
+    # NOTE: Без проверки, иначе видимые через search_path таблицы схемы public
+    # считаются существующими
+    await connection.run_sync(partial(Base.metadata.create_all, checkfirst=False))
+
+
+async def _seed_cocktails(connection: AsyncConnection, start: int, stop: int) -> None:
+    """Добавить коктейли с ID от `start` до `stop` включительно."""
+    await connection.execute(
+        text(
+            "INSERT INTO cocktail (id, name, description, version) "
+            "SELECT i, (CAST(:names AS text[]))[1 + i % :count] || ' ' || i, "
+            "'Описание ' || md5(i::text), 1 "
+            "FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer)) "
+            "AS i",
+        ),
+        {"names": list(NAMES), "count": len(NAMES), "start": start, "stop": stop},
+    )
+    await connection.exec_driver_sql("ANALYZE cocktail")
+
+
+async def _seed_ingredients(connection: AsyncConnection) -> None:
+    """Добавить ингредиенты с ID от 1 до `INGREDIENT_COUNT`."""
+    await connection.execute(
+        Ingredient.__table__.insert(),  # type: ignore[attr-defined]
+        [{"id": i, "name": f"Ингредиент {i}"} for i in range(1, INGREDIENT_COUNT + 1)],
+    )
+
+
+async def _seed_components(connection: AsyncConnection, start: int, stop: int) -> None:
+    """Добавить составы коктейлей с ID от `start` до `stop` включительно."""
+    await connection.execute(
+        text(
+            "INSERT INTO component (cocktail_id, ingredient_id, quantity) "
+            "SELECT i, 1 + (i + 37 * j) % CAST(:count AS integer), 10 "
+            "FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer)) "
+            "AS i, generate_series(0, 2 + i % 4) AS j",
+        ),
+        {"count": INGREDIENT_COUNT, "start": start, "stop": stop},
+    )
+    await connection.exec_driver_sql("ANALYZE component")
+
+
+async def _timed(fn: Callable[[], Awaitable[Any]]) -> tuple[float, Any]:
+    """Медианное время выполнения `fn` в мс и ее результат."""
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = await fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def _service(session: AsyncSession) -> CocktailService:
+    # NOTE: Кеши отключены, чтобы каждый вызов выполнял запрос к БД
+    return CocktailService(
+        session,
+        CocktailIngredientIndex(),
+        LRUCache(max_size=0),
+        SearchResultCache(max_size=0),
+    )
+
+
+async def benchmark_search(sizes: Sequence[int]) -> None:
+    """Время поиска коктейлей по названию и описанию."""
+    async with async_engine.connect() as connection:
+        await _prepare(connection)
+        session = AsyncSession(bind=connection)
+        service = _service(session)
+
+        seeded = 0
+        for size in sorted(sizes):
+            await _seed_cocktails(connection, seeded + 1, size)
+            seeded = size
+            for value in SEARCH_QUERIES:
+                elapsed, found = await _timed(partial(service.search, value))
+                session.expunge_all()
+                print(
+                    f"search x{size}: {value!r} {elapsed:.1f} ms, {len(found)} rows",
+                )
+
+        await session.close()
+        await connection.rollback()
+
+
+async def benchmark_index(sizes: Sequence[int]) -> None:
+    """Время фильтрации коктейлей по индексу в памяти и запросом к БД."""
+    async with async_engine.connect() as connection:
+        await _prepare(connection)
+        await _seed_ingredients(connection)
+        session = AsyncSession(bind=connection)
+        # NOTE: Пока индекс не построен, сервис выполняет запросы к БД
+        services = {"index": _service(session), "sql": _service(session)}
+
+        seeded = 0
+        for size in sorted(sizes):
+            await _seed_cocktails(connection, seeded + 1, size)
+            await _seed_components(connection, seeded + 1, size)
+            seeded = size
+
+            start = time.perf_counter()
+            await services["index"].build_index()
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"build_index x{size}: {elapsed:.1f} ms")
+
+            for name, query in INDEX_QUERIES.items():
+                for label, service in services.items():
+                    elapsed, found = await _timed(partial(query, service))
+                    session.expunge_all()
+                    print(
+                        f"{name} x{size}: {label} {elapsed:.1f} ms, {len(found)} rows",
+                    )
+
+        await session.close()
+        await connection.rollback()
+
+
+BENCHMARKS = {
+    "search": (benchmark_search, [10_000, 100_000, 1_000_000]),
+    "index": (benchmark_index, [100_000]),
+}
+
+
+def main() -> None:
+    """Точка входа."""
+    parser = argparse.ArgumentParser(prog="python -m app.services.benchmark")
+    parser.add_argument("benchmark", choices=list(BENCHMARKS))
+    parser.add_argument("sizes", nargs="*", type=int, help="число коктейлей")
+    args = parser.parse_args()
+    benchmark, sizes = BENCHMARKS[args.benchmark]
+    asyncio.run(benchmark(args.sizes or sizes))
+
+
+if __name__ == "__main__":
+    main()
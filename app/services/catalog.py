@@ -0,0 +1,73 @@
+"""Модуль каталога ингредиентов в памяти процесса."""
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from app.models.ingredient import Ingredient
+
+
+@dataclass(frozen=True, slots=True)
+class IngredientCatalog:
+    """Неизменяемый снимок всех ингредиентов.
+
+    Используется формами коктейлей, которым нужны все ингредиенты и поиск по
+    названию и ID.
+    """
+
+    version: int
+    ingredients: tuple[Ingredient, ...]
+    # Название -> ID
+    by_name: Mapping[str, int]
+    # ID -> ингредиент
+    by_id: Mapping[int, Ingredient]
+
+    @classmethod
+    def build(
+        cls,
+        version: int,
+        ingredients: Iterable[Ingredient],
+    ) -> "IngredientCatalog":
+        # NOTE: if i.id для корректной аннотации
+        items = tuple(i for i in ingredients if i.id)
+        by_id = {i.id: i for i in items if i.id}
+        return cls(
+            version=version,
+            ingredients=items,
+            by_name=MappingProxyType({i.name: i_id for i_id, i in by_id.items()}),
+            by_id=MappingProxyType(by_id),
+        )
+
+
+class IngredientCatalogHolder:
+    """Текущий каталог ингредиентов процесса.
+
+    Каталог строится при первом обращении и сбрасывается `invalidate` при
+    изменении ингредиентов. Версия увеличивается при каждом сбросе.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self.current: IngredientCatalog | None = None
+
+    def publish(
+        self,
+        version: int,
+        ingredients: Iterable[Ingredient],
+    ) -> IngredientCatalog:
+        """Построить каталог по ингредиентам, прочитанным при версии `version`.
+
+        Если с тех пор каталог был сброшен, данные могли устареть, и каталог
+        не сохраняется.
+        """
+        catalog = IngredientCatalog.build(version, ingredients)
+        if version == self.version:
+            self.current = catalog
+        return catalog
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self.current = None
+
+
+ingredient_catalog = IngredientCatalogHolder()
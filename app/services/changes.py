@@ -0,0 +1,49 @@
+"""Модуль обработки изменений данных, сделанных другими процессами."""
+
+import logging
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import query_cache
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.notify import Change
+from app.core.versions import data_versions
+from app.models import Cocktail, Ingredient
+from app.services.catalog import ingredient_catalog
+from app.services.cocktail import CocktailService
+from app.services.index import cocktail_index
+
+logger = logging.getLogger(__name__)
+
+
+async def apply_change(change: Change | None) -> None:
+    """Сбросить кеши и обновить индекс коктейлей по изменению."""
+    if change is None:
+        query_cache.clear()
+        data_versions.reset()
+    else:
+        tags = ((change.table,), (change.table, change.item_id))
+        query_cache.invalidate(*tags)
+        data_versions.bump(*tags)
+
+    if change is None or change.table == Ingredient.__tablename__:
+        ingredient_catalog.invalidate()
+
+    if not settings.COCKTAIL_INDEX_ENABLED:
+        return
+
+    try:
+        async with AsyncSession(async_engine) as session:
+            service = CocktailService(session)
+            # NOTE: Изменения ингредиентов не меняют состав коктейлей, удалить
+            # ингредиент, входящий в коктейль, нельзя. Изменения коктейлей
+            # применяются и во время первого построения индекса: обновления
+            # выполняются под блокировкой индекса после чтения снимка
+            if change is None:
+                if cocktail_index.is_ready:
+                    await service.build_index()
+            elif change.table == Cocktail.__tablename__ and change.item_id is not None:
+                await service.refresh_index(change.item_id)
+    except Exception:
+        logger.exception("Ошибка обновления индекса коктейлей")
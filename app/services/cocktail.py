@@ -1,43 +1,319 @@
-from collections.abc import Sequence
+from bisect import bisect_right
+from collections.abc import Hashable, Sequence
+from typing import Any, cast
 
-from sqlalchemy import func
-from sqlmodel import col, select
+from sqlalchemy import case, func, literal, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import QueryableAttribute, joinedload, raiseload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
+from sqlmodel import col, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.cache import Cache
+from app.core.config import settings
+from app.core.utils import escape_like
+from app.core.versions import data_versions
 from app.models import Component, Ingredient
 from app.models.cocktail import Cocktail, CocktailCreate, CocktailUpdate
-from app.models.forms import FiltersFrom
-from app.services.base import BaseService
+from app.models.forms import FiltersFrom, InventoryForm
+from app.services.base import BaseService, LoadStrategy
+from app.services.index import CocktailIngredientIndex, cocktail_index
+from app.services.search import SearchResultCache, cocktail_search_results
 
 
 class CocktailService(BaseService[Cocktail, CocktailCreate, CocktailUpdate]):
-    def __init__(self, session):
-        super().__init__(Cocktail, session)
-
-    def filter_all(self, filters: FiltersFrom) -> Sequence[Cocktail]:
-        if filters.filters:
-            query = (
-                select(self.model)
-                .join(Component, col(self.model.id) == col(Component.cocktail_id))
-                .join(Ingredient, col(Component.ingredient_id) == col(Ingredient.id))
-                .where(col(Component.ingredient_id).in_(filters.filters))
-                .group_by(col(self.model.id))
-                .having(
-                    func.count(col(Ingredient.id).distinct()) == len(filters.filters)
+    def __init__(
+        self,
+        session: AsyncSession,
+        index: CocktailIngredientIndex | None = None,
+        cache: Cache | None = None,
+        search_results: SearchResultCache[Cocktail] | None = None,
+    ) -> None:
+        super().__init__(Cocktail, session, cache)
+        self.index = cocktail_index if index is None else index
+        self.search_results = (
+            cocktail_search_results if search_results is None else search_results
+        )
+
+    async def build_index(self) -> None:
+        """Построить индекс ингредиентов коктейлей по данным БД."""
+        query = select(Component.cocktail_id, Component.ingredient_id)
+        async with self.index.lock:
+            self.index.build(await self.session.exec(query))
+
+    async def refresh_index(self, item_id: int) -> None:
+        """Обновить состав коктейля в индексе по данным БД."""
+        query = select(Component.ingredient_id).where(
+            col(Component.cocktail_id) == item_id,
+        )
+        async with self.index.lock:
+            ingredient_ids = (await self.session.exec(query)).all()
+            if ingredient_ids:
+                self.index.set_cocktail(item_id, ingredient_ids)
+            else:
+                self.index.remove_cocktail(item_id)
+
+    def _load_options(self, strategy: LoadStrategy) -> list[ORMOption]:
+        options = super()._load_options(strategy)
+        # NOTE: SQLModel аннотирует атрибуты моделей типами значений, а не
+        # атрибутами SQLAlchemy
+        components = cast(QueryableAttribute[Any], Cocktail.components)
+        ingredient = cast(QueryableAttribute[Any], Component.ingredient)
+        ingredient_icon = cast(QueryableAttribute[Any], Ingredient.icon)
+        match strategy:
+            case LoadStrategy.SELECTIN:
+                options.append(
+                    selectinload(components)
+                    .selectinload(ingredient)
+                    .defer(ingredient_icon, raiseload=True),
+                )
+            case LoadStrategy.JOINED:
+                options.append(
+                    joinedload(components)
+                    .joinedload(ingredient)
+                    .defer(ingredient_icon, raiseload=True),
                 )
+            case _:
+                options.append(raiseload(components))
+        return options
+
+    def _dependency_tags(self, load: LoadStrategy) -> tuple[Hashable, ...]:
+        if load == LoadStrategy.NONE:
+            return ()
+        return ((Ingredient.__tablename__,),)
+
+    async def filter_all(
+        self,
+        filters: FiltersFrom,
+        after_id: int | None = None,
+        limit: int | None = None,
+        load: LoadStrategy = LoadStrategy.NONE,
+    ) -> Sequence[Cocktail]:
+        """Коктейли, содержащие все ингредиенты из фильтра.
+
+        При указании `after_id` и `limit` возвращается страница результатов.
+        """
+        # NOTE: Удаление ингредиента меняет состав коктейлей
+        return await self._cached(
+            ("filter", frozenset(filters.filters or ()), after_id, limit, load),
+            ((self.table,), (Ingredient.__tablename__,)),
+            lambda: self._filter_all(filters, after_id, limit, load),
+        )
+
+    async def _filter_all(
+        self,
+        filters: FiltersFrom,
+        after_id: int | None,
+        limit: int | None,
+        load: LoadStrategy,
+    ) -> list[Cocktail]:
+        query = select(self.model).order_by(col(self.model.id))
+
+        if filters.filters and self.index.is_ready:
+            cocktail_ids = self.index.match_all(filters.filters)
+            if after_id is not None:
+                cocktail_ids = cocktail_ids[bisect_right(cocktail_ids, after_id) :]
+            if limit is not None:
+                cocktail_ids = cocktail_ids[:limit]
+            if not cocktail_ids:
+                return []
+            query = query.where(col(self.model.id).in_(cocktail_ids))
+        else:
+            if filters.filters:
+                # NOTE: Запрос к БД, если индекс еще не построен
+                query = (
+                    query.join(
+                        Component, col(self.model.id) == col(Component.cocktail_id)
+                    )
+                    .join(
+                        Ingredient, col(Component.ingredient_id) == col(Ingredient.id)
+                    )
+                    .where(col(Component.ingredient_id).in_(filters.filters))
+                    .group_by(col(self.model.id))
+                    .having(
+                        func.count(col(Ingredient.id).distinct())
+                        == len(filters.filters)
+                    )
+                )
+            if after_id is not None:
+                query = query.where(col(self.model.id) > after_id)
+            if limit is not None:
+                query = query.limit(limit)
+
+        query = query.options(*self._load_options(load))
+        return await self._fetch_all(query)
+
+    async def rank_by_inventory(
+        self,
+        inventory: InventoryForm,
+        after: tuple[int, int] | None = None,
+        limit: int | None = None,
+        load: LoadStrategy = LoadStrategy.NONE,
+    ) -> list[tuple[Cocktail, int]]:
+        """Коктейли с числом недостающих ингредиентов из домашнего бара.
+
+        При указании `after` - (число недостающих ингредиентов, ID) последнего
+        коктейля предыдущей страницы - и `limit` возвращается страница
+        результатов.
+        """
+        ingredient_ids = inventory.ingredients or []
+
+        if self.index.is_ready:
+            ranked = self.index.rank_by_inventory(ingredient_ids, inventory.max_missing)
+            if after is not None:
+                start = bisect_right(ranked, after, key=lambda i: (i[1], i[0]))
+                ranked = ranked[start:]
+            if limit is not None:
+                ranked = ranked[:limit]
+        else:
+            # NOTE: Запрос к БД, если индекс еще не построен
+            missing = func.count().filter(
+                col(Component.ingredient_id).not_in(ingredient_ids),
+            )
+            ranked_query = (
+                select(col(Component.cocktail_id), missing)
+                .group_by(col(Component.cocktail_id))
+                .having(missing <= inventory.max_missing)
+                .order_by(missing, col(Component.cocktail_id))
             )
-            cocktails = self.session.exec(query).all()
+            if after is not None:
+                ranked_query = ranked_query.having(
+                    tuple_(missing, col(Component.cocktail_id))
+                    > tuple_(*map(literal, after)),
+                )
+            if limit is not None:
+                ranked_query = ranked_query.limit(limit)
+            ranked = list((await self.session.exec(ranked_query)).all())
+
+        if not ranked:
+            return []
+
+        query = (
+            select(self.model)
+            .where(col(self.model.id).in_([i for i, _ in ranked]))
+            .options(*self._load_options(load))
+        )
+        cocktails = {i.id: i for i in (await self.session.exec(query)).unique()}
+        return [
+            (cocktails[cocktail_id], missing)
+            for cocktail_id, missing in ranked
+            if cocktail_id in cocktails
+        ]
+
+    async def search(
+        self,
+        value: str | None,
+        after: tuple[int, int] | None = None,
+        limit: int | None = None,
+        load: LoadStrategy = LoadStrategy.NONE,
+    ) -> Sequence[Cocktail]:
+        """Поиск коктейлей по названию и описанию.
+
+        Результаты упорядочены по релевантности и ID. Для получения следующей
+        страницы передается `after` - пара (релевантность, ID) последнего
+        коктейля, см. `search_cursor`.
+        """
+        return await self._cached(
+            ("search", value, after, limit, load),
+            ((self.table,), *self._dependency_tags(load)),
+            lambda: self._search(value, after, limit, load),
+        )
+
+    async def _search(
+        self,
+        value: str | None,
+        after: tuple[int, int] | None,
+        limit: int | None,
+        load: LoadStrategy,
+    ) -> list[Cocktail]:
+        limit = limit or settings.SEARCH_LIMIT
+        if not value or load != LoadStrategy.NONE:
+            return await self._search_query(value, after, limit, load)
+
+        # NOTE: Уточняющий запрос отбирается из результатов предыдущего в памяти
+        version = data_versions.etag([(self.table,)])
+        candidates = self.search_results.get(value, version)
+        if candidates is None:
+            if after is not None:
+                return await self._search_query(value, after, limit, load)
+            max_rows = settings.SEARCH_RESULTS_MAX_ROWS
+            found = await self._search_query(value, None, max_rows + 1, load)
+            if len(found) > max_rows:
+                return found[:limit]
+            candidates = tuple(found)
+            self._detach(found)
         else:
-            cocktails = self.get_all()
-        return cocktails
+            needle = value.lower()
+            candidates = tuple(
+                i
+                for i in candidates
+                if needle in i.name.lower()
+                or (i.description is not None and needle in i.description.lower())
+            )
+        self.search_results.set(value, version, candidates)
+
+        ranked = sorted(candidates, key=lambda i: self.search_cursor(i, value))
+        if after is not None:
+            ranked = [i for i in ranked if self.search_cursor(i, value) > after]
+        return ranked[:limit]
+
+    async def _search_query(
+        self,
+        value: str | None,
+        after: tuple[int, int] | None,
+        limit: int,
+        load: LoadStrategy,
+    ) -> list[Cocktail]:
+        query = select(self.model)
 
-    def search(self, value: str | None) -> Sequence[Cocktail]:
         if value:
-            query = select(Cocktail).where(col(Cocktail.name).ilike(f"%{value}%"))
+            # NOTE: `ILIKE '%...%'` использует триграммные GIN индексы
+            value = escape_like(value)
+            name = col(self.model.name)
+            description = col(self.model.description)
+            # Сначала совпадения в начале названия, затем в названии, затем в описании
+            relevance = case(
+                (name.ilike(f"{value}%", escape="\\"), 0),
+                (name.ilike(f"%{value}%", escape="\\"), 1),
+                else_=2,
+            )
+            query = query.where(
+                or_(
+                    name.ilike(f"%{value}%", escape="\\"),
+                    description.ilike(f"%{value}%", escape="\\"),
+                ),
+            ).order_by(relevance, col(self.model.id))
+            if after is not None:
+                query = query.where(
+                    tuple_(relevance, col(self.model.id))
+                    > tuple_(*map(literal, after)),
+                )
         else:
-            query = select(Cocktail)
-        return self.session.exec(query).all()
+            query = query.order_by(col(self.model.id))
+            if after is not None:
+                query = query.where(col(self.model.id) > after[1])
+
+        query = query.limit(limit).options(
+            *self._load_options(load),
+        )
+        return await self._fetch_all(query)
 
-    def create(self, data: CocktailCreate) -> Cocktail:
+    @staticmethod
+    def search_cursor(cocktail: Cocktail, value: str | None) -> tuple[int, int]:
+        """Позиция коктейля в результатах `search` - (релевантность, ID)."""
+        if cocktail.id is None:
+            msg = "Коктейль не сохранен"
+            raise ValueError(msg)
+
+        relevance = 0
+        if value:
+            value = value.lower()
+            name = cocktail.name.lower()
+            if not name.startswith(value):
+                relevance = 1 if value in name else 2
+        return relevance, cocktail.id
+
+    async def create(self, data: CocktailCreate) -> Cocktail:
         new_cocktail = Cocktail.model_validate(
             data.model_dump(include={"name", "description"}),
         )
@@ -47,13 +323,19 @@ class CocktailService(BaseService[Cocktail, CocktailCreate, CocktailUpdate]):
         ]
 
         self.session.add(new_cocktail)
-        self.session.commit()
-        self.session.refresh(new_cocktail)
+        await self.session.flush()
+        await self._commit(new_cocktail.id)
+        await self.session.refresh(new_cocktail)
+
+        if new_cocktail.id is not None:
+            async with self.index.lock:
+                self.index.set_cocktail(new_cocktail.id, data.components)
+        self._changed(new_cocktail.id)
 
         return new_cocktail
 
-    def update(self, item_id: int, data: CocktailUpdate) -> Cocktail:
-        cocktail = self.get(item_id)
+    async def update(self, item_id: int, data: CocktailUpdate) -> Cocktail:
+        cocktail = await self._get(item_id)
         if cocktail is None:
             msg = "Доделать"
             raise ValueError(msg)
@@ -61,39 +343,45 @@ class CocktailService(BaseService[Cocktail, CocktailCreate, CocktailUpdate]):
         cocktail.sqlmodel_update(
             data.model_dump(include={"name", "description"}, exclude_unset=True),
         )
+        self.session.add(cocktail)
+        await self._bump_version(cocktail)
 
+        # Удаление лишних компонентов и вставка/обновление остальных одним
+        # запросом, независимо от числа компонентов
         components = data.components
-
-        deleted = []
-        updated = []
-        for component in cocktail.components:
-            if component.ingredient_id not in components:
-                deleted.append(component)
-            else:
-                new_quantity = components[component.ingredient_id]
-                if new_quantity != component.quantity:
-                    component.quantity = new_quantity
-                    updated.append(component)
-                components.pop(component.ingredient_id)
-
-        for ingredient_id, quantity in components.items():
-            self.session.add(
-                Component(
-                    quantity=quantity,
-                    ingredient_id=ingredient_id,
-                    cocktail_id=cocktail.id,
-                )
+        removed = (
+            delete(Component)
+            .where(
+                col(Component.cocktail_id) == item_id,
+                col(Component.ingredient_id).not_in(list(components)),
             )
+            .cte("removed")
+        )
+        upsert = insert(Component).values(
+            [
+                {
+                    "cocktail_id": item_id,
+                    "ingredient_id": ingredient_id,
+                    "quantity": quantity,
+                }
+                for ingredient_id, quantity in components.items()
+            ],
+        )
+        query = upsert.on_conflict_do_update(
+            constraint="uq_component_cocktail_ingredient",
+            set_={"quantity": upsert.excluded.quantity},
+            where=col(Component.quantity) != upsert.excluded.quantity,
+        ).add_cte(removed)
+        await self.session.exec(query)  # type: ignore[call-overload]
+        await self._commit(item_id)
 
-        self.session.add(cocktail)
-
-        if updated:
-            self.session.add_all(updated)
-
-        for item in deleted:
-            self.session.delete(item)
-
-        self.session.commit()
-        self.session.refresh(cocktail)
+        async with self.index.lock:
+            self.index.set_cocktail(item_id, components)
+        self._changed(item_id)
 
         return cocktail
+
+    async def delete(self, item_id: int) -> None:
+        await super().delete(item_id)
+        async with self.index.lock:
+            self.index.remove_cocktail(item_id)
@@ -0,0 +1,61 @@
+"""Модуль черновиков формы коктейля.
+
+Состав коктейля в форме добавления/редактирования хранится на сервере по
+токену черновика, поэтому запросы изменения состава передают только
+изменяемый компонент.
+"""
+
+import secrets
+from collections.abc import Mapping
+from typing import Protocol
+
+from app.core.cache import MISSING, LRUCache
+from app.core.config import settings
+
+# ID ингредиента -> количество, в порядке добавления
+Components = dict[int, int]
+
+
+class DraftStore(Protocol):
+    """Хранилище черновиков."""
+
+    def create(self, components: Mapping[int, int] | None = None) -> str: ...
+
+    def get(self, token: str) -> Components | None: ...
+
+    def save(self, token: str, components: Components) -> None: ...
+
+    def delete(self, token: str) -> None: ...
+
+
+class MemoryDraftStore:
+    """Черновики в памяти процесса с ограничением числа и времени жизни.
+
+    NOTE: При нескольких процессах запросы одного черновика должны попадать
+    в один процесс, иначе нужна реализация `DraftStore` на общем хранилище.
+    """
+
+    def __init__(self, max_size: int, ttl: float | None = None) -> None:
+        self._drafts = LRUCache(max_size=max_size, ttl=ttl)
+
+    def create(self, components: Mapping[int, int] | None = None) -> str:
+        token = secrets.token_urlsafe(16)
+        self._drafts.set(token, dict(components or {}))
+        return token
+
+    def get(self, token: str) -> Components | None:
+        components = self._drafts.get(token)
+        return None if components is MISSING else components
+
+    def save(self, token: str, components: Components) -> None:
+        """Сохранить черновик, время жизни отсчитывается заново."""
+        self._drafts.set(token, components)
+
+    def delete(self, token: str) -> None:
+        self._drafts.delete(token)
+
+
+cocktail_drafts = MemoryDraftStore(
+    max_size=settings.DRAFT_STORE_SIZE,
+    ttl=settings.DRAFT_TTL,
+)
@@ -0,0 +1,129 @@
+"""Модуль проверки планов выполнения частых запросов.
+
+Запросы сервисов выполняются на отдельном соединении, их SQL перехватывается
+и передается в `EXPLAIN` с отключенным `enable_seqscan`. Если планировщик все
+равно выбирает последовательное сканирование, подходящего индекса нет.
+
+Запуск: `python -m app.services.explain`
+"""
+
+import asyncio
+import logging
+import sys
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Any, NamedTuple
+
+from sqlalchemy import event, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.db import async_engine
+from app.models.forms import FiltersFrom, InventoryForm
+from app.services.base import LoadStrategy
+from app.services.cocktail import CocktailService
+from app.services.index import CocktailIngredientIndex
+from app.services.ingredient import IngredientService
+from app.services.search import SearchResultCache
+
+logger = logging.getLogger(__name__)
+
+_Query = Callable[[CocktailService, IngredientService], Awaitable[Any]]
+
+# NOTE: Индекс в памяти не строится и кеши отключены, чтобы проверялись запросы к БД
+HOT_QUERIES: dict[str, _Query] = {
+    "cocktail.get": lambda c, _: c.get(1, LoadStrategy.JOINED),
+    "cocktail.get_page": lambda c, _: c.get_page(1),
+    "cocktail.get_icon": lambda c, _: c.get_icon(1),
+    "cocktail.search": lambda c, _: c.search("мохито"),
+    "cocktail.filter_all": lambda c, _: c.filter_all(FiltersFrom(filters=[1, 2])),
+    "cocktail.rank_by_inventory": lambda c, _: c.rank_by_inventory(
+        InventoryForm(ingredients=[1, 2]),
+    ),
+    "ingredient.get": lambda _, i: i.get(1),
+    "ingredient.get_page": lambda _, i: i.get_page(1),
+}
+
+
+class QueryPlan(NamedTuple):
+    name: str
+    statement: str
+    seq_scans: list[str]
+
+
+def _walk_plan(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_plan(child)
+
+
+async def explain_hot_queries() -> list[QueryPlan]:
+    """Планы выполнения частых запросов сервисов."""
+    reports = []
+    async with async_engine.connect() as connection:
+        captured: list[tuple[str, Any]] = []
+
+        def _capture(_conn, _cursor, statement, parameters, _context, _many) -> None:
+            captured.append((statement, parameters))
+
+        await connection.execute(text("SET LOCAL enable_seqscan = off"))
+        event.listen(connection.sync_connection, "before_cursor_execute", _capture)
+
+        session = AsyncSession(bind=connection)
+        cache = LRUCache(max_size=0)
+        cocktail_service = CocktailService(
+            session,
+            CocktailIngredientIndex(),
+            cache,
+            SearchResultCache(max_size=0),
+        )
+        ingredient_service = IngredientService(session, cache)
+
+        try:
+            for name, query in HOT_QUERIES.items():
+                captured.clear()
+                await query(cocktail_service, ingredient_service)
+                statements = list(captured)
+
+                for statement, parameters in statements:
+                    result = await connection.exec_driver_sql(
+                        f"EXPLAIN (FORMAT JSON) {statement}",
+                        parameters,
+                    )
+                    plan = result.scalar_one()[0]["Plan"]
+                    seq_scans = [
+                        node.get("Relation Name", "?")
+                        for node in _walk_plan(plan)
+                        if node["Node Type"] == "Seq Scan"
+                    ]
+                    reports.append(QueryPlan(name, statement, seq_scans))
+        finally:
+            await session.close()
+            event.remove(connection.sync_connection, "before_cursor_execute", _capture)
+            await connection.rollback()
+
+    return reports
+
+
+async def log_hot_queries() -> None:
+    """Вывести в лог запросы с последовательным сканированием."""
+    for report in await explain_hot_queries():
+        if report.seq_scans:
+            logger.warning(
+                "Seq Scan в запросе %s по таблицам %s",
+                report.name,
+                ", ".join(report.seq_scans),
+            )
+
+
+def main() -> None:
+    """Точка входа."""
+    reports = asyncio.run(explain_hot_queries())
+    for report in reports:
+        status = "SEQ SCAN " + ", ".join(report.seq_scans) if report.seq_scans else "OK"
+        print(f"{report.name}: {status}")
+
+    sys.exit(1 if any(report.seq_scans for report in reports) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Модуль инвертированного индекса ингредиентов коктейлей."""
+
+import asyncio
+from collections.abc import Iterable
+
+
+def _bits_to_ids(mask: int) -> list[int]:
+    """Номера установленных битов маски в порядке возрастания."""
+    bits = bin(mask)[:1:-1]
+    ids = []
+    idx = bits.find("1")
+    while idx != -1:
+        ids.append(idx)
+        idx = bits.find("1", idx + 1)
+    return ids
+
+
+class CocktailIngredientIndex:
+    """Инвертированный индекс ингредиент -> множество коктейлей.
+
+    Множество коктейлей хранится битовой маской (`int`), номер бита равен ID
+    коктейля. Фильтрация по нескольким ингредиентам сводится к пересечению
+    масок. Для каждого коктейля также хранится сигнатура - маска ID его
+    ингредиентов, по которой считается число недостающих ингредиентов.
+
+    Изменения индекса по данным БД выполняются под `lock`, чтобы построение
+    по устаревшему снимку не затерло более поздние изменения.
+    """
+
+    def __init__(self) -> None:
+        self.is_ready = False
+        self.lock = asyncio.Lock()
+        # ID ингредиента -> маска коктейлей
+        self._cocktails: dict[int, int] = {}
+        # ID коктейля -> маска ингредиентов
+        self._signatures: dict[int, int] = {}
+
+    def build(self, components: Iterable[tuple[int, int]]) -> None:
+        """Построить индекс по парам (ID коктейля, ID ингредиента)."""
+        cocktails: dict[int, int] = {}
+        signatures: dict[int, int] = {}
+        for cocktail_id, ingredient_id in components:
+            cocktails[ingredient_id] = cocktails.get(ingredient_id, 0) | (
+                1 << cocktail_id
+            )
+            signatures[cocktail_id] = signatures.get(cocktail_id, 0) | (
+                1 << ingredient_id
+            )
+
+        self._cocktails = cocktails
+        self._signatures = signatures
+        self.is_ready = True
+
+    def set_cocktail(self, cocktail_id: int, ingredient_ids: Iterable[int]) -> None:
+        """Добавить или заменить состав коктейля."""
+        self.remove_cocktail(cocktail_id)
+
+        bit = 1 << cocktail_id
+        signature = 0
+        for ingredient_id in ingredient_ids:
+            self._cocktails[ingredient_id] = self._cocktails.get(ingredient_id, 0) | bit
+            signature |= 1 << ingredient_id
+        self._signatures[cocktail_id] = signature
+
+    def remove_cocktail(self, cocktail_id: int) -> None:
+        """Удалить коктейль из индекса."""
+        bit = 1 << cocktail_id
+        for ingredient_id in _bits_to_ids(self._signatures.pop(cocktail_id, 0)):
+            mask = self._cocktails[ingredient_id] & ~bit
+            if mask:
+                self._cocktails[ingredient_id] = mask
+            else:
+                del self._cocktails[ingredient_id]
+
+    def match_all(self, ingredient_ids: Iterable[int]) -> list[int]:
+        """ID коктейлей, содержащих все указанные ингредиенты."""
+        mask = -1
+        for ingredient_id in set(ingredient_ids):
+            mask &= self._cocktails.get(ingredient_id, 0)
+            if not mask:
+                return []
+        if mask == -1:
+            return sorted(self._signatures)
+        return _bits_to_ids(mask)
+
+    def rank_by_inventory(
+        self,
+        ingredient_ids: Iterable[int],
+        max_missing: int,
+    ) -> list[tuple[int, int]]:
+        """Коктейли, которые можно приготовить из имеющихся ингредиентов.
+
+        Возвращает пары (ID коктейля, число недостающих ингредиентов),
+        отсортированные по числу недостающих ингредиентов и ID коктейля.
+        """
+        # NOTE: Учитываются только ингредиенты из индекса, ID из запроса могут
+        # быть отрицательными или очень большими
+        inventory = 0
+        for ingredient_id in ingredient_ids:
+            if ingredient_id in self._cocktails:
+                inventory |= 1 << ingredient_id
+
+        missing_mask = ~inventory
+        ranked = [
+            (missing, cocktail_id)
+            for cocktail_id, signature in self._signatures.items()
+            if (missing := (signature & missing_mask).bit_count()) <= max_missing
+        ]
+        ranked.sort()
+        return [(cocktail_id, missing) for missing, cocktail_id in ranked]
+
+
+cocktail_index = CocktailIngredientIndex()
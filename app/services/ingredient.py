@@ -1,7 +1,42 @@
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import Cache
 from app.models.ingredient import Ingredient, IngredientCreate, IngredientUpdate
-from app.services.base import BaseService
+from app.services.base import BaseService, LoadStrategy
+from app.services.catalog import (
+    IngredientCatalog,
+    IngredientCatalogHolder,
+    ingredient_catalog,
+)
 
 
 class IngredientService(BaseService[Ingredient, IngredientCreate, IngredientUpdate]):
-    def __init__(self, session):
-        super().__init__(Ingredient, session)
+    def __init__(
+        self,
+        session: AsyncSession,
+        cache: Cache | None = None,
+        catalog: IngredientCatalogHolder | None = None,
+    ) -> None:
+        super().__init__(Ingredient, session, cache)
+        self.catalog = ingredient_catalog if catalog is None else catalog
+
+    async def get_catalog(self) -> IngredientCatalog:
+        """Каталог всех ингредиентов, запрос к БД только после изменений."""
+        catalog = self.catalog.current
+        if catalog is not None:
+            return catalog
+
+        version = self.catalog.version
+        query = (
+            select(self.model)
+            .order_by(col(self.model.id))
+            .options(*self._load_options(LoadStrategy.NONE))
+        )
+        ingredients = await self._fetch_all(query)
+        self._detach(ingredients)
+        return self.catalog.publish(version, ingredients)
+
+    def _changed(self, item_id: int | None) -> None:
+        super()._changed(item_id)
+        self.catalog.invalidate()
@@ -0,0 +1,73 @@
+"""Модуль кеша полных наборов результатов поиска.
+
+Поиск ищет подстроку, поэтому результаты запроса, содержащего ранее
+выполненный запрос (`"мох"` -> `"мохито"`), - подмножество результатов
+предыдущего. Их можно отобрать в памяти без запроса к БД.
+"""
+
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Generic, TypeVar
+
+from app.core.config import settings
+from app.models import Cocktail
+
+_T = TypeVar("_T")
+
+
+class SearchResultCache(Generic[_T]):
+    """Последние полные наборы результатов поиска по запросам.
+
+    Набор действителен, пока не изменилась версия данных, с которой он был
+    получен.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._items: OrderedDict[str, tuple[str, tuple[_T, ...]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, value: str, version: str) -> tuple[_T, ...] | None:
+        """Наименьший набор результатов запроса, содержащегося в `value`."""
+        value = value.lower()
+        best: tuple[str, tuple[_T, ...]] | None = None
+        for query, (item_version, items) in self._items.items():
+            if item_version != version or query not in value:
+                continue
+            if best is None or len(items) < len(best[1]):
+                best = (query, items)
+
+        if best is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(best[0])
+        self.hits += 1
+        return best[1]
+
+    def set(self, value: str, version: str, items: Sequence[_T]) -> None:
+        if self.max_size <= 0:
+            return
+        value = value.lower()
+        self._items[value] = (version, tuple(items))
+        self._items.move_to_end(value)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+        }
+
+
+cocktail_search_results = SearchResultCache[Cocktail](
+    max_size=settings.SEARCH_RESULTS_CACHE_SIZE,
+)
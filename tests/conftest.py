@@ -0,0 +1,6 @@
+import os
+
+# NOTE: Настройки обязательны при импорте модулей приложения, тесты к БД не
+# подключаются
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ.setdefault("POSTGRES_SERVER", "localhost")
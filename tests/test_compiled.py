@@ -0,0 +1,112 @@
+import pytest
+from app.html_services.cocktail import CocktailHTMLService
+from app.html_services.compiled import CompiledRow
+from app.html_services.ingredient import IngredientHTMLService
+from app.models import Cocktail, Ingredient
+from app.models.enums import IngredientType, TypeABV
+from fasthtml.common import P, Td, Tr, to_xml
+
+
+def _cocktails(count: int) -> list[Cocktail]:
+    return [
+        Cocktail(
+            id=i,
+            name=f"Коктейль <{i}> & 'co'",
+            description=None if i % 3 else f'Описание "{i}"',
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def _ingredients(count: int) -> list[Ingredient]:
+    abv, types = list(TypeABV), list(IngredientType)
+    return [
+        Ingredient(
+            id=i,
+            name=f"Ингредиент {i} <b>",
+            description=None if i % 2 else f"Описание & {i}",
+            abv=None if i % 5 == 0 else abv[i % len(abv)],
+            type_=types[i % len(types)],
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def _assert_same(render: CompiledRow, items: list) -> None:
+    for item in items:
+        assert render(item) == to_xml(render.render(item))
+    # Шаблон не был отключен из-за расхождения
+    assert render._parts is not None
+
+
+@pytest.mark.parametrize("count", [1_000, 10_000])
+def test_cocktail_row(count: int) -> None:
+    render = CompiledRow(CocktailHTMLService.row_view, verify=0)
+    _assert_same(render, _cocktails(count))
+
+
+@pytest.mark.parametrize("count", [1_000, 10_000])
+def test_ingredient_row(count: int) -> None:
+    render = CompiledRow(IngredientHTMLService().row_view, verify=0)
+    _assert_same(render, _ingredients(count))
+
+
+@pytest.mark.parametrize(
+    ("name", "description"),
+    [
+        ("<script>alert('x')</script>", "a & b"),
+        ('"кавычки"', "<b>жирный</b>"),
+        ("", ""),
+        ("Без описания", None),
+    ],
+)
+def test_escaping_and_empty_fields(name: str, description: str | None) -> None:
+    render = CompiledRow(CocktailHTMLService.row_view, verify=0)
+    # NOTE: Без валидации, как у записей, прочитанных из БД
+    cocktail = Cocktail.model_construct(id=1, name=name, description=description)
+    html = render(cocktail)
+    assert html == to_xml(CocktailHTMLService.row_view(cocktail))
+    assert "<script>" not in html
+
+
+def test_fallback_on_mismatch() -> None:
+    render = CompiledRow(CocktailHTMLService.row_view, verify=1)
+    render._compile()
+    assert render._parts is not None
+    render._parts = ["<tr>wrong</tr>"]
+    cocktail = Cocktail(id=1, name="Мохито", description="Описание")
+    assert render(cocktail) == to_xml(CocktailHTMLService.row_view(cocktail))
+    assert render._parts is None
+
+
+def _title_row(cocktail: Cocktail) -> Tr:
+    return Tr(
+        Td(P(cocktail.name), title=cocktail.name),
+        Td(P(f"{cocktail.description} мл")),
+        data_id=cocktail.id,
+    )
+
+
+@pytest.mark.parametrize(
+    ("item_id", "name", "description"),
+    [
+        (1, 'a"b', None),
+        (2, 'it\'s "x" <b>', "a & b"),
+        (3, "", ""),
+        (0, "Мохито", "Описание"),
+    ],
+)
+def test_values_in_attribute_slots(
+    item_id: int,
+    name: str,
+    description: str | None,
+) -> None:
+    render = CompiledRow(_title_row, verify=0)
+    cocktail = Cocktail.model_construct(
+        id=item_id,
+        name=name,
+        description=description,
+    )
+    html = render(cocktail)
+    assert html == to_xml(_title_row(cocktail))
+    assert 'title="a"b"' not in html
@@ -0,0 +1,89 @@
+import asyncio
+import gzip
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from app.api.compression import CompressionMiddleware
+from app.core.assets import StaticAssets
+from starlette.types import Message, Receive, Scope, Send
+
+BODY = "".join(f"<tr><td>Коктейль {i}</td></tr>" for i in range(500)).encode()
+
+
+def _brotli() -> Callable[[bytes], bytes]:
+    brotli = pytest.importorskip("brotli")
+    return brotli.decompress
+
+
+def _zstd() -> Callable[[bytes], bytes]:
+    zstandard = pytest.importorskip("zstandard")
+    # NOTE: В потоковом ответе размер содержимого в заголовке кадра не указан
+    return lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+DECODERS = {
+    "gzip": lambda: gzip.decompress,
+    "br": _brotli,
+    "zstd": _zstd,
+}
+
+
+async def _app(scope: Scope, receive: Receive, send: Send) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/html; charset=utf-8")],
+        },
+    )
+    # Тело ответа по частям, как у потокового ответа
+    chunks = [BODY[i : i + 4096] for i in range(0, len(BODY), 4096)]
+    for i, chunk in enumerate(chunks, 1):
+        await send(
+            {
+                "type": "http.response.body",
+                "body": chunk,
+                "more_body": i < len(chunks),
+            },
+        )
+
+
+def _request(encoding: str) -> tuple[dict[str, str], bytes]:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", encoding.encode())],
+    }
+    messages: list[Message] = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: Message) -> None:
+        messages.append(message)
+
+    asyncio.run(CompressionMiddleware(_app)(scope, receive, send))
+    headers = {k.decode(): v.decode() for k, v in messages[0]["headers"]}
+    return headers, b"".join(i.get("body", b"") for i in messages[1:])
+
+
+@pytest.mark.parametrize("encoding", list(DECODERS))
+def test_middleware_round_trip(encoding: str) -> None:
+    decompress = DECODERS[encoding]()
+    headers, body = _request(encoding)
+    assert headers["content-encoding"] == encoding
+    assert len(body) < len(BODY)
+    assert decompress(body) == BODY
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_static_variants_round_trip(encoding: str, tmp_path: Path) -> None:
+    decompress = DECODERS[encoding]()
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "style.css").write_bytes(BODY)
+    assets = StaticAssets(tmp_path)
+    found = assets.find("css/style.css")
+    assert found is not None
+    assert decompress(found[0].variants[encoding]) == BODY
@@ -0,0 +1,83 @@
+import pytest
+from app.services.index import CocktailIngredientIndex
+
+
+@pytest.fixture
+def index() -> CocktailIngredientIndex:
+    index = CocktailIngredientIndex()
+    index.build([(1, 10), (1, 20), (2, 10), (3, 10), (3, 20), (3, 30), (100, 30)])
+    return index
+
+
+def test_build(index: CocktailIngredientIndex) -> None:
+    assert index.is_ready
+    assert index.match_all([]) == [1, 2, 3, 100]
+
+
+def test_build_replaces_previous_data(index: CocktailIngredientIndex) -> None:
+    index.build([(5, 10)])
+    assert index.match_all([10]) == [5]
+    assert index.match_all([20]) == []
+
+
+def test_match_all(index: CocktailIngredientIndex) -> None:
+    assert index.match_all([10]) == [1, 2, 3]
+    assert index.match_all([10, 20]) == [1, 3]
+    assert index.match_all([20, 10, 20]) == [1, 3]
+    assert index.match_all([30]) == [3, 100]
+    assert index.match_all([10, 40]) == []
+
+
+def test_set_cocktail(index: CocktailIngredientIndex) -> None:
+    index.set_cocktail(4, [20, 30])
+    assert index.match_all([20, 30]) == [3, 4]
+
+    # Замена состава
+    index.set_cocktail(1, [30])
+    assert index.match_all([10]) == [2, 3]
+    assert index.match_all([30]) == [1, 3, 4, 100]
+
+
+def test_remove_cocktail(index: CocktailIngredientIndex) -> None:
+    index.remove_cocktail(100)
+    assert index.match_all([30]) == [3]
+    assert index.match_all([]) == [1, 2, 3]
+
+    # Удаление отсутствующего коктейля
+    index.remove_cocktail(100)
+    assert index.match_all([]) == [1, 2, 3]
+
+
+def test_remove_last_cocktail_of_ingredient(index: CocktailIngredientIndex) -> None:
+    index.remove_cocktail(2)
+    index.remove_cocktail(1)
+    index.remove_cocktail(3)
+    assert index.match_all([10]) == []
+    assert index._cocktails == {30: 1 << 100}
+
+
+def test_rank_by_inventory(index: CocktailIngredientIndex) -> None:
+    assert index.rank_by_inventory([10, 20], max_missing=0) == [(1, 0), (2, 0)]
+    assert index.rank_by_inventory([10, 20], max_missing=1) == [
+        (1, 0),
+        (2, 0),
+        (3, 1),
+        (100, 1),
+    ]
+    assert index.rank_by_inventory([], max_missing=1) == [
+        (2, 1),
+        (100, 1),
+    ]
+
+
+def test_rank_by_inventory_ignores_unknown_ingredients(
+    index: CocktailIngredientIndex,
+) -> None:
+    assert index.rank_by_inventory([30, 999], max_missing=0) == [(100, 0)]
+
+
+def test_rank_by_inventory_ignores_invalid_ingredients(
+    index: CocktailIngredientIndex,
+) -> None:
+    assert index.rank_by_inventory([30, -1], max_missing=0) == [(100, 0)]
+    assert index.rank_by_inventory([30, 10**10], max_missing=0) == [(100, 0)]
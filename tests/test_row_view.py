@@ -0,0 +1,76 @@
+import re
+from collections.abc import Callable
+
+import pytest
+from app.api.routes.main import render_shell
+from app.html_services.cocktail import CocktailHTMLService
+from app.html_services.ingredient import IngredientHTMLService
+from app.models import Cocktail, Ingredient
+from fasthtml.common import to_xml
+
+# С векторами иконок в каждой строке строка коктейля занимала ~2.2 КБ
+MAX_ROW_BYTES = 1_500
+ROWS = 50
+
+
+def _cocktails_view(count: int) -> str:
+    cocktails = [
+        Cocktail(id=i, name=f"Мохито {i}", description="Описание")
+        for i in range(1, count + 1)
+    ]
+    return to_xml(CocktailHTMLService.all_view(cocktails))
+
+
+def _ingredients_view(count: int) -> str:
+    ingredients = [
+        Ingredient(id=i, name=f"Ром {i}", description="Описание")
+        for i in range(1, count + 1)
+    ]
+    return to_xml(IngredientHTMLService().all_view(ingredients))
+
+
+VIEWS = pytest.mark.parametrize(
+    "view",
+    [_cocktails_view, _ingredients_view],
+    ids=["cocktail", "ingredient"],
+)
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        to_xml(
+            CocktailHTMLService.row_view(
+                Cocktail(id=123456, name="Мохито", description="Описание"),
+            ),
+        ),
+        to_xml(
+            IngredientHTMLService().row_view(
+                Ingredient(id=123456, name="Ром", description="Описание"),
+            ),
+        ),
+    ],
+    ids=["cocktail", "ingredient"],
+)
+def test_row_icons_reference_sprite(html: str) -> None:
+    assert "<path" not in html
+    # Иконки - только ссылки на символы спрайта
+    svgs = re.findall(r"<svg[^>]*>(.*?)</svg>", html, re.DOTALL)
+    assert svgs
+    for content in svgs:
+        assert re.fullmatch(r'\s*<use href="#icon-[\w-]+"/>\s*', content)
+    assert len(html.encode()) <= MAX_ROW_BYTES
+
+
+@VIEWS
+def test_row_icons_defined_in_shell(view: Callable[[int], str]) -> None:
+    symbols = set(re.findall(r'<symbol id="([\w-]+)"', render_shell()))
+    icons = set(re.findall(r'href="#(icon-[\w-]+)"', view(ROWS)))
+    assert icons
+    assert icons <= symbols
+
+
+@VIEWS
+def test_all_view_size(view: Callable[[int], str]) -> None:
+    empty = len(view(0).encode())
+    assert len(view(ROWS).encode()) <= empty + ROWS * MAX_ROW_BYTES